@@ -2,17 +2,41 @@
 Module for caching the result of distributed dataframe calculations to parquet files.
 
 Caches are keyed by a hash that is function of set code, aggregation type, base filter,
-and groupbys.
+and groupbys. The cache index also records the group by, filter and column signatures of
+each cache file, so that a coarser query can be rolled up from a finer cached aggregate.
 
-Caches are cleared per-set when new files are downloaded.
+Caches are cleared per-set when new files are downloaded. When new rows are appended
+incrementally, only the caches whose draft date range overlaps the new rows are removed,
+using the range recorded for each cache key in the set's cache index.
+
+Each set's external directory also holds a small json catalog describing its files,
+written at ingest, which is trusted only while the fingerprints of the files it describes
+still match.
+
+Parquet write options for the external and cache files are read from the environment or
+from the `spells.toml` config file, see `parquet_options`.
+
+A set may also have a pre-aggregated base cube per view in its external directory, the
+base sums at a fine grain, with a json sidecar recording the grain and column signatures
+and trusted only while the fingerprint of the view's files still matches.
 """
 
+import contextlib
+import datetime
+import glob
+import json
 from enum import StrEnum
 import os
+import re
 import sys
+import threading
+import time
+import tomllib
 
 import polars as pl
 
+from spells.enums import ColName
+
 
 class EventType(StrEnum):
     PREMIER = "PremierDraft"
@@ -24,6 +48,85 @@ class DataDir(StrEnum):
     EXTERNAL = "external"
 
 
+class PartitionBy(StrEnum):
+    DAY = "day"
+    WEEK = "week"
+
+
+# hive-style directory keys for partitioned external files, whose values are the
+# first draft date of the partition
+PARTITION_KEYS = {
+    PartitionBy.DAY: "draft_date",
+    PartitionBy.WEEK: "draft_week_start",
+}
+
+PARTITION_DAYS = {
+    PartitionBy.DAY: 1,
+    PartitionBy.WEEK: 7,
+}
+
+# per-set json file recording, for each cache key, the draft date range it covers, how it
+# was calculated, its size, when it was written and last read, and how often it was read
+CACHE_INDEX = "index.json"
+
+# bounds on the local cache, with the environment variable setting each and its parser,
+# see `cache_budget`
+CACHE_BUDGET = {
+    "max_size": ("SPELLS_CACHE_MAX_SIZE", lambda value: _parse_size(value)),
+    "max_age_days": ("SPELLS_CACHE_MAX_AGE_DAYS", float),
+}
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+# guards read-modify-write cycles of the cache indexes by concurrent summons, see
+# `_index_lock`
+_INDEX_LOCK = threading.Lock()
+
+# lock file in the cache root held by the process rewriting cache indexes, taken to be
+# left by a process that died if older than INDEX_LOCK_STALE_SECONDS
+INDEX_LOCK = "index.lock"
+INDEX_LOCK_STALE_SECONDS = 60
+
+# parquet write options, with the environment variable setting each and its parser.
+# Options not set anywhere are left to the polars defaults.
+PARQUET_OPTIONS = {
+    "compression": ("SPELLS_PARQUET_COMPRESSION", str),
+    "compression_level": ("SPELLS_PARQUET_COMPRESSION_LEVEL", int),
+    "row_group_size": ("SPELLS_PARQUET_ROW_GROUP_SIZE", int),
+    "data_page_size": ("SPELLS_PARQUET_DATA_PAGE_SIZE", int),
+    "statistics": (
+        "SPELLS_PARQUET_STATISTICS",
+        lambda value: value if value == "full" else value.lower() in ("1", "true"),
+    ),
+}
+
+# per-set json file describing the external files, see `read_catalog`
+CATALOG = "catalog.json"
+
+# the finest grain of the base cubes unless configured, see `cube_group_by`
+DEFAULT_CUBE_GROUP_BY = (
+    ColName.NAME,
+    ColName.DRAFT_DATE,
+    ColName.RANK,
+    ColName.PLAYER_COHORT,
+    ColName.MAIN_COLORS,
+)
+
+# row index of the draft and game files, referenced by the sparse card tables
+ROW_ID = "row_id"
+
+# name-mapped columns written to the sparse "{view}_sparse" tables in long format
+SPARSE_PREFIXES = (
+    ColName.PACK_CARD,
+    ColName.POOL,
+    ColName.DECK,
+    ColName.SIDEBOARD,
+    ColName.DRAWN,
+    ColName.TUTORED,
+    ColName.OPENING_HAND,
+)
+
+
 def spells_print(mode, content):
     print(f"🪄 {mode} ✨ {content}")
 
@@ -41,6 +144,78 @@ def data_home() -> str:
     )
 
 
+def config_path() -> str:
+    return os.path.expanduser(
+        os.environ.get("SPELLS_CONFIG", os.path.join(data_home(), "spells.toml"))
+    )
+
+
+def parquet_options(data_dir: DataDir) -> dict:
+    """
+    Keyword arguments for `write_parquet` and `sink_parquet` when writing the external
+    or cache files. The `[parquet]` table of the config file applies to both, and the
+    `[parquet.external]` and `[parquet.cache]` tables to each, e.g.
+
+        [parquet]
+        compression = "zstd"
+        compression_level = 3
+
+        [parquet.external]
+        row_group_size = 100000
+        statistics = "full"
+
+    Environment variables in `PARQUET_OPTIONS` take precedence over the file.
+    """
+    options = {}
+    if os.path.isfile(path := config_path()):
+        with open(path, "rb") as f:
+            config = tomllib.load(f).get("parquet", {})
+        for table in (config, config.get(str(data_dir), {})):
+            options.update(
+                (key, value) for key, value in table.items() if key in PARQUET_OPTIONS
+            )
+
+    for key, (env_var, parse) in PARQUET_OPTIONS.items():
+        if env_var in os.environ:
+            options[key] = parse(os.environ[env_var])
+
+    return options
+
+
+def _parse_size(value: str | int) -> int:
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?)(i?B)?\s*", str(value), re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Invalid size {value!r}, expected e.g. 500MB or 20GB")
+    return int(float(match[1]) * SIZE_UNITS[match[2].upper()])
+
+
+def cache_budget() -> dict:
+    """
+    Bounds on the size of the local cache and the age of its files since they were last
+    read, from the `[cache]` table of the config file, e.g.
+
+        [cache]
+        max_size = "20GB"
+        max_age_days = 30
+
+    Environment variables in `CACHE_BUDGET` take precedence over the file. Sizes are in
+    bytes or with a K, M, G or T suffix, in powers of 1024. Bounds not set don't apply.
+    """
+    budget = {}
+    if os.path.isfile(path := config_path()):
+        with open(path, "rb") as f:
+            config = tomllib.load(f).get("cache", {})
+        for key, (_, parse) in CACHE_BUDGET.items():
+            if key in config:
+                budget[key] = parse(config[key])
+
+    for key, (env_var, parse) in CACHE_BUDGET.items():
+        if env_var in os.environ:
+            budget[key] = parse(os.environ[env_var])
+
+    return budget
+
+
 def data_dir_path(cache_dir: DataDir) -> str:
     """
     Where 17Lands data is stored. MDU_DATA_DIR environment variable is used, if it exists,
@@ -73,6 +248,179 @@ def data_file_path(set_code, dataset_type: str, event_type=EventType.PREMIER):
     )
 
 
+def catalog_path(set_code: str) -> str:
+    return os.path.join(external_set_path(set_code), f"{set_code}_{CATALOG}")
+
+
+def fingerprint(set_code: str, dataset_type: str) -> list[list] | None:
+    """
+    Relative path, size and modification time of each file of a data set, or None if
+    it doesn't exist
+    """
+    set_path = external_set_path(set_code)
+    paths = data_file_paths(set_code, dataset_type)
+    if not all(os.path.isfile(path) for path in paths):
+        return None
+    stats = [(path, os.stat(path)) for path in paths]
+    return [
+        [os.path.relpath(path, set_path), stat.st_size, stat.st_mtime_ns]
+        for path, stat in stats
+    ]
+
+
+def _encode_json(value):
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Can't write {value!r} to the catalog")
+
+
+def _decode_json(value: dict):
+    if value.keys() == {"$datetime"}:
+        return datetime.datetime.fromisoformat(value["$datetime"])
+    if value.keys() == {"$date"}:
+        return datetime.date.fromisoformat(value["$date"])
+    return value
+
+
+def read_catalog(set_code: str, dataset_types: tuple[str, ...] = ()) -> dict | None:
+    """
+    The set's catalog, if there is one and the files of each of `dataset_types` are
+    unchanged since it was written
+    """
+    path = catalog_path(set_code)
+    if not os.path.isfile(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        catalog = json.load(f, object_hook=_decode_json)
+    for dataset_type in dataset_types:
+        entry = catalog.get("files", {}).get(dataset_type)
+        if entry is None or entry["fingerprint"] != fingerprint(set_code, dataset_type):
+            return None
+    return catalog
+
+
+def is_categorical(catalog: dict | None) -> bool:
+    """
+    Whether the set of the catalog is read with categorical columns, as recorded or,
+    for earlier versions, as written to its files
+    """
+    if catalog is None:
+        return False
+    return catalog.get("categorical", False) or any(
+        dtype.startswith("Categorical")
+        for entry in catalog["files"].values()
+        for dtype in entry["columns"].values()
+    )
+
+
+def write_catalog(set_code: str, catalog: dict) -> None:
+    path = catalog_path(set_code)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(catalog, f, indent=2, default=_encode_json)
+    os.replace(path + ".tmp", path)
+
+
+def cube_group_by() -> list[str] | None:
+    """
+    The configured grain of the base cubes, a comma-separated $SPELLS_CUBE_GROUP_BY or
+    the `group_by` of the `[cube]` table of the config file, e.g.
+
+        [cube]
+        group_by = ["name", "draft_date", "rank", "pick_num"]
+
+    or None if not configured
+    """
+    if "SPELLS_CUBE_GROUP_BY" in os.environ:
+        return os.environ["SPELLS_CUBE_GROUP_BY"].split(",")
+    if os.path.isfile(path := config_path()):
+        with open(path, "rb") as f:
+            return tomllib.load(f).get("cube", {}).get("group_by")
+    return None
+
+
+def cube_path(set_code: str, view: str) -> str:
+    return data_file_path(set_code, f"{view}_cube")
+
+
+def cube_meta_path(set_code: str, view: str) -> str:
+    return cube_path(set_code, view).removesuffix(".parquet") + ".json"
+
+
+def read_cube_meta(set_code: str, view: str) -> dict | None:
+    """
+    The grain, column signatures and source fingerprint of the base cube of a view, if
+    there is one
+    """
+    path = cube_meta_path(set_code, view)
+    if not os.path.isfile(path) or not os.path.isfile(cube_path(set_code, view)):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_cube(
+    set_code: str,
+    view: str,
+    df: pl.DataFrame,
+    group_by: list[str],
+    signatures: dict[str, str],
+) -> None:
+    df.write_parquet(cube_path(set_code, view), **parquet_options(DataDir.EXTERNAL))
+    meta = {
+        "group_by": group_by,
+        "columns": signatures,
+        "fingerprint": fingerprint(set_code, view),
+    }
+    path = cube_meta_path(set_code, view)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def data_file_paths(
+    set_code,
+    dataset_type: str,
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+    event_type=EventType.PREMIER,
+) -> list[str]:
+    """
+    The parquet files making up a data set. A partitioned data set is a directory of
+    hive-style partitions by draft date, which are pruned to those overlapping the
+    inclusive range [start, end].
+    """
+    path = data_file_path(set_code, dataset_type, event_type=event_type)
+    if not os.path.isdir(path):
+        return [path]
+
+    partition_days = {
+        PARTITION_KEYS[partition_by]: days
+        for partition_by, days in PARTITION_DAYS.items()
+    }
+    paths = []
+    with os.scandir(path) as data_dir:
+        partitions = sorted(entry.name for entry in data_dir if entry.is_dir())
+    for partition in partitions:
+        key, _, value = partition.partition("=")
+        try:
+            period_start = datetime.date.fromisoformat(value)
+        except ValueError:
+            period_start = None
+        if period_start is not None and key in partition_days:
+            period_end = period_start + datetime.timedelta(days=partition_days[key] - 1)
+            if (start is not None and period_end < start) or (
+                end is not None and period_start > end
+            ):
+                continue
+        paths.extend(
+            sorted(glob.glob(os.path.join(glob.escape(path), partition, "*.parquet")))
+        )
+
+    return paths
+
+
 def cache_dir_for_set(set_code: str) -> str:
     return os.path.join(data_dir_path(DataDir.CACHE), set_code)
 
@@ -91,12 +439,224 @@ def read_cache(set_code: str, cache_key: str) -> pl.DataFrame:
     return pl.read_parquet(cache_path_for_key(set_code, cache_key))
 
 
-def write_cache(set_code: str, cache_key: str, df: pl.DataFrame) -> None:
+def scan_cache(set_code: str, cache_key: str) -> pl.LazyFrame:
+    """
+    A plan reading a cache file. With a cache budget, see `cache_budget`, the file is
+    read now instead, since a later write may evict it before the plan is collected.
+    """
+    if cache_budget():
+        return read_cache(set_code, cache_key).lazy()
+    return pl.scan_parquet(cache_path_for_key(set_code, cache_key))
+
+
+def cache_index_path(set_code: str) -> str:
+    return os.path.join(cache_dir_for_set(set_code), CACHE_INDEX)
+
+
+def _encode_index_json(value):
+    # filter values json can't represent are recorded by repr, matching no filter
+    if isinstance(value, datetime.date):
+        return _encode_json(value)
+    return repr(value)
+
+
+def read_cache_index(set_code: str) -> dict[str, dict]:
+    path = cache_index_path(set_code)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f, object_hook=_decode_json)
+
+
+def write_cache_index(set_code: str, index: dict[str, dict]) -> None:
+    path = cache_index_path(set_code)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, default=_encode_index_json)
+    os.replace(path + ".tmp", path)
+
+
+@contextlib.contextmanager
+def _index_lock():
+    """
+    Hold the cache indexes of every set against other threads, and against other
+    processes sharing the data home by creating the lock file exclusively, since
+    eviction rewrites the indexes of every set
+    """
+    cache_root = data_dir_path(DataDir.CACHE)
+    os.makedirs(cache_root, exist_ok=True)
+    path = os.path.join(cache_root, INDEX_LOCK)
+    with _INDEX_LOCK:
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) > INDEX_LOCK_STALE_SECONDS:
+                        os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(0.01)
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        try:
+            yield
+        finally:
+            os.remove(path)
+
+
+def write_cache(
+    set_code: str,
+    cache_key: str,
+    df: pl.DataFrame,
+    date_range: tuple[datetime.date | None, datetime.date | None] = (None, None),
+    meta: dict | None = None,
+) -> None:
+    """
+    Write a cache file and record it in the set's cache index, with its draft date range
+    and any `meta` describing how it was calculated, then evict files over the budget
+    """
+    cache_dir = cache_dir_for_set(set_code)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    path = cache_path_for_key(set_code, cache_key)
+    df.write_parquet(path, **parquet_options(DataDir.CACHE))
+
+    now = datetime.datetime.now()
+    with _index_lock():
+        index = read_cache_index(set_code)
+        index[cache_key] = {
+            "draft_date_range": [
+                None if d is None else d.isoformat() for d in date_range
+            ],
+            **(meta or {}),
+            "size": os.path.getsize(path),
+            "created": now,
+            "last_access": now,
+            "hits": 0,
+        }
+        write_cache_index(set_code, index)
+
+    evict(keep=(set_code, cache_key))
+
+
+def record_hit(set_code: str, cache_key: str) -> None:
+    """
+    Count a read of a cache file, in whole or in part, and when it was last read
+    """
+    with _index_lock():
+        index = read_cache_index(set_code)
+        if cache_key not in index:
+            return
+        entry = index[cache_key]
+        entry["hits"] = entry.get("hits", 0) + 1
+        entry["last_access"] = datetime.datetime.now()
+        write_cache_index(set_code, index)
+
+
+def evict(keep: tuple[str, str] | None = None) -> int:
+    """
+    Remove the cache files of every set last read longer ago than the maximum age, then
+    the least recently read until the local cache fits the maximum size, see
+    `cache_budget`, except for `keep`, a set code and cache key. Files written before the
+    index recorded their size and last read are dated by their modification time.
+    """
+    mode = "evict"
+    budget = cache_budget()
+    cache_root = data_dir_path(DataDir.CACHE)
+    if not budget or not os.path.isdir(cache_root):
+        return 0
+
+    max_size = budget.get("max_size")
+    cutoff = (
+        datetime.datetime.now() - datetime.timedelta(days=budget["max_age_days"])
+        if "max_age_days" in budget
+        else None
+    )
+
+    with _index_lock():
+        indexes = {}
+        files = []
+        with os.scandir(cache_root) as cache_dir:
+            for set_dir in cache_dir:
+                if not set_dir.is_dir():
+                    continue
+                index = indexes[set_dir.name] = read_cache_index(set_dir.name)
+                for entry in os.scandir(set_dir):
+                    if not entry.name.endswith(".parquet"):
+                        continue
+                    cache_key = entry.name[: -len(".parquet")]
+                    recorded = index.get(cache_key, {})
+                    stat = entry.stat()
+                    last_access = recorded.get(
+                        "last_access", datetime.datetime.fromtimestamp(stat.st_mtime)
+                    )
+                    size = recorded.get("size", stat.st_size)
+                    files.append((last_access, size, set_dir.name, cache_key))
+
+        total_size = sum(size for _, size, _, _ in files)
+        changed, count, freed = set(), 0, 0
+        for last_access, size, set_code, cache_key in sorted(files):
+            too_old = cutoff is not None and last_access < cutoff
+            too_big = max_size is not None and total_size > max_size
+            if (set_code, cache_key) == keep or not (too_old or too_big):
+                continue
+            os.remove(cache_path_for_key(set_code, cache_key))
+            indexes[set_code].pop(cache_key, None)
+            changed.add(set_code)
+            total_size -= size
+            count += 1
+            freed += size
+
+        for set_code in changed:
+            write_cache_index(set_code, indexes[set_code])
+
+    if count:
+        spells_print(
+            mode,
+            f"Removed {count} files ({freed / 1024:,.0f}KiB) over budget from local cache",
+        )
+    return count
+
+
+def invalidate(set_code: str, start: datetime.date, end: datetime.date) -> int:
+    """
+    Remove the cache files whose recorded draft date range overlaps the inclusive range
+    [start, end], as well as any without a recorded range.
+    """
+    mode = "clean"
+
     cache_dir = cache_dir_for_set(set_code)
     if not os.path.isdir(cache_dir):
-        os.makedirs(cache_dir)
+        return 0
 
-    df.write_parquet(cache_path_for_key(set_code, cache_key))
+    count = 0
+    with _index_lock():
+        index = read_cache_index(set_code)
+        with os.scandir(cache_dir) as set_dir:
+            for entry in set_dir:
+                if not entry.name.endswith(".parquet"):
+                    continue
+                cache_key = entry.name[: -len(".parquet")]
+                lo, hi = (
+                    None if d is None else datetime.date.fromisoformat(d)
+                    for d in index.get(cache_key, {}).get(
+                        "draft_date_range", [None, None]
+                    )
+                )
+                if (lo is not None and lo > end) or (hi is not None and hi < start):
+                    continue
+                os.remove(entry)
+                index.pop(cache_key, None)
+                count += 1
+        write_cache_index(set_code, index)
+
+    spells_print(
+        mode,
+        f"Removed {count} files from local cache for set {set_code} covering {start} to {end}",
+    )
+    return count
 
 
 def clean(set_code: str) -> int:
@@ -106,7 +666,8 @@ def clean(set_code: str) -> int:
         cache_dir = data_dir_path(DataDir.CACHE)
         with os.scandir(cache_dir) as set_dir:
             for entry in set_dir:
-                clean(entry.name)
+                if entry.is_dir():
+                    clean(entry.name)
         return 0
 
     cache_dir = cache_dir_for_set(set_code)
@@ -114,6 +675,9 @@ def clean(set_code: str) -> int:
         with os.scandir(cache_dir) as set_dir:
             count = 0
             for entry in set_dir:
+                if entry.name == CACHE_INDEX:
+                    os.remove(entry)
+                    continue
                 if not entry.name.endswith(".parquet"):
                     spells_print(
                         mode,
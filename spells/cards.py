@@ -74,7 +74,10 @@ def _extract_value(set_code: str, name: str, card_dict: dict, field: CardAttr):
             return card_dict.get("json", "")
 
 
-def card_df(draft_set_code: str, names: list[str]) -> pl.DataFrame:
+def fetch_card_data(draft_set_code: str) -> dict[str, dict]:
+    """
+    MTGJSON card data by name (and face name) for every set in the draft booster
+    """
     draft_set_json = _fetch_mtg_json(draft_set_code)
     booster_info = draft_set_json["data"]["booster"]
 
@@ -97,6 +100,17 @@ def card_df(draft_set_code: str, names: list[str]) -> pl.DataFrame:
         card_data_map.update({item["faceName"]: item for item in face_name_cards})
         card_data_map.update({item["name"]: item for item in card_data})
 
+    return card_data_map
+
+
+def card_df(
+    draft_set_code: str,
+    names: list[str],
+    card_data_map: dict[str, dict] | None = None,
+) -> pl.DataFrame:
+    if card_data_map is None:
+        card_data_map = fetch_card_data(draft_set_code)
+
     return pl.DataFrame(
         [
             {
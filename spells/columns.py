@@ -57,13 +57,17 @@ _specs: dict[str, ColSpec] = {
         views=[View.GAME, View.DRAFT],
         col_type=ColType.FILTER_ONLY,
     ),
+    ColName.DRAFT_KEY: ColSpec(
+        views=[View.GAME, View.DRAFT],
+        col_type=ColType.FILTER_ONLY,
+    ),
     ColName.DRAFT_TIME: ColSpec(
         col_type=ColType.FILTER_ONLY,
         views=[View.GAME, View.DRAFT],
     ),
     ColName.DRAFT_DATE: ColSpec(
         col_type=ColType.GROUP_BY,
-        expr=pl.col(ColName.DRAFT_TIME).str.to_datetime("%Y-%m-%d %H:%M:%S").dt.date(),
+        expr=pl.col(ColName.DRAFT_TIME).dt.date(),
     ),
     ColName.FORMAT_DAY: ColSpec(
         col_type=ColType.GROUP_BY,
@@ -74,17 +78,15 @@ _specs: dict[str, ColSpec] = {
     ),
     ColName.DRAFT_DAY_OF_WEEK: ColSpec(
         col_type=ColType.GROUP_BY,
-        expr=pl.col(ColName.DRAFT_TIME)
-        .str.to_datetime("%Y-%m-%d %H:%M:%S")
-        .dt.weekday(),
+        expr=pl.col(ColName.DRAFT_TIME).dt.weekday(),
     ),
     ColName.DRAFT_HOUR: ColSpec(
         col_type=ColType.GROUP_BY,
-        expr=pl.col(ColName.DRAFT_TIME).str.to_datetime("%Y-%m-%d %H:%M:%S").dt.hour(),
+        expr=pl.col(ColName.DRAFT_TIME).dt.hour(),
     ),
     ColName.DRAFT_WEEK: ColSpec(
         col_type=ColType.GROUP_BY,
-        expr=pl.col(ColName.DRAFT_TIME).str.to_datetime("%Y-%m-%d %H:%M:%S").dt.week(),
+        expr=pl.col(ColName.DRAFT_TIME).dt.week(),
     ),
     ColName.FORMAT_WEEK: ColSpec(
         col_type=ColType.GROUP_BY, expr=(pl.col(ColName.FORMAT_DAY) - 1) // 7 + 1
@@ -217,21 +219,19 @@ _specs: dict[str, ColSpec] = {
     ),
     ColName.GAME_DATE: ColSpec(
         col_type=ColType.GROUP_BY,
-        expr=pl.col(ColName.GAME_TIME).str.to_datetime("%Y-%m-%d %H-%M-%S").dt.date(),
+        expr=pl.col(ColName.GAME_TIME).dt.date(),
     ),
     ColName.GAME_DAY_OF_WEEK: ColSpec(
         col_type=ColType.GROUP_BY,
-        expr=pl.col(ColName.GAME_TIME)
-        .str.to_datetime("%Y-%m-%d %H-%M-%S")
-        .dt.weekday(),
+        expr=pl.col(ColName.GAME_TIME).dt.weekday(),
     ),
     ColName.GAME_HOUR: ColSpec(
         col_type=ColType.GROUP_BY,
-        expr=pl.col(ColName.GAME_TIME).str.to_datetime("%Y-%m-%d %H-%M-%S").dt.hour(),
+        expr=pl.col(ColName.GAME_TIME).dt.hour(),
     ),
     ColName.GAME_WEEK: ColSpec(
         col_type=ColType.GROUP_BY,
-        expr=pl.col(ColName.GAME_TIME).str.to_datetime("%Y-%m-%d %H-%M-%S").dt.week(),
+        expr=pl.col(ColName.GAME_TIME).dt.week(),
     ),
     ColName.BUILD_INDEX: ColSpec(
         col_type=ColType.GROUP_BY,
@@ -267,7 +267,7 @@ _specs: dict[str, ColSpec] = {
     ),
     ColName.NUM_COLORS: ColSpec(
         col_type=ColType.GROUP_BY,
-        expr=pl.col(ColName.MAIN_COLORS).str.len_chars(),
+        expr=pl.col(ColName.MAIN_COLORS).cast(pl.String).str.len_chars(),
     ),
     ColName.SPLASH_COLORS: ColSpec(
         col_type=ColType.GROUP_BY,
@@ -275,7 +275,7 @@ _specs: dict[str, ColSpec] = {
     ),
     ColName.HAS_SPLASH: ColSpec(
         col_type=ColType.GROUP_BY,
-        expr=pl.col(ColName.SPLASH_COLORS).str.len_chars() > 0,
+        expr=pl.col(ColName.SPLASH_COLORS).cast(pl.String).str.len_chars() > 0,
     ),
     ColName.ON_PLAY: ColSpec(
         col_type=ColType.GROUP_BY,
@@ -0,0 +1,169 @@
+"""
+Resumable downloads of large files over HTTP.
+
+Files are fetched as byte ranges in parallel into a `.part` file next to the target,
+with the completed ranges recorded in a `.part.json` sidecar, so an interrupted download
+picks up where it left off as long as the remote file (size and ETag) hasn't changed.
+The result is checked against the advertised size, and against the ETag when it is a
+plain MD5 digest (as for single-part S3 uploads), before being moved into place.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from spells import cache
+
+USER_AGENT = "spells-mtg/0.1.0"
+RANGE_SIZE = 16 * 1024 * 1024
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+READ_SIZE = 1024 * 1024
+TIMEOUT = 60
+
+
+class DownloadError(Exception):
+    pass
+
+
+def _request(url: str, method: str = "GET", byte_range: tuple[int, int] | None = None):
+    headers = {"User-Agent": USER_AGENT}
+    if byte_range is not None:
+        headers["Range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+    request = urllib.request.Request(url, headers=headers, method=method)
+    return urllib.request.urlopen(request, timeout=TIMEOUT)
+
+
+def _remote_info(url: str) -> tuple[int | None, str | None, bool]:
+    """
+    Size, ETag and range support of the remote file
+    """
+    with _request(url, method="HEAD") as response:
+        length = response.headers.get("Content-Length")
+        return (
+            int(length) if length is not None else None,
+            response.headers.get("ETag"),
+            response.headers.get("Accept-Ranges") == "bytes",
+        )
+
+
+def _read_state(state_path: str, size: int, etag: str | None) -> set[int]:
+    if not os.path.isfile(state_path):
+        return set()
+    with open(state_path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("size") != size or state.get("etag") != etag:
+        return set()
+    return set(state.get("done", []))
+
+
+def _write_state(state_path: str, size: int, etag: str | None, done: set[int]):
+    with open(state_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"size": size, "etag": etag, "done": sorted(done)}, f)
+    os.replace(state_path + ".tmp", state_path)
+
+
+def _fetch_range(url: str, part_path: str, start: int, end: int):
+    for attempt in range(MAX_RETRIES):
+        try:
+            with _request(url, byte_range=(start, end)) as response:
+                if response.status != 206:
+                    raise DownloadError(f"Range request to {url} was not honored")
+                with open(part_path, "r+b") as f:
+                    f.seek(start)
+                    written = 0
+                    while chunk := response.read(READ_SIZE):
+                        f.write(chunk)
+                        written += len(chunk)
+            if written != end - start + 1:
+                raise DownloadError(
+                    f"Expected {end - start + 1} bytes at offset {start}, got {written}"
+                )
+            return
+        except (OSError, DownloadError):
+            if attempt == MAX_RETRIES - 1:
+                raise
+
+
+def _fetch_all(url: str, part_path: str):
+    with _request(url) as response, open(part_path, "wb") as f:
+        while chunk := response.read(READ_SIZE):
+            f.write(chunk)
+
+
+def _verify(path: str, size: int | None, etag: str | None):
+    actual_size = os.path.getsize(path)
+    if size is not None and actual_size != size:
+        raise DownloadError(f"Expected {size} bytes, downloaded {actual_size}")
+
+    digest = etag.strip('"') if etag is not None else ""
+    if re.fullmatch("[0-9a-f]{32}", digest):
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            while chunk := f.read(READ_SIZE):
+                md5.update(chunk)
+        if md5.hexdigest() != digest:
+            raise DownloadError(f"Checksum of {path} does not match ETag {etag}")
+
+
+def download(
+    url: str,
+    path: str,
+    range_size: int = RANGE_SIZE,
+    max_workers: int = MAX_WORKERS,
+):
+    """
+    Download `url` to `path`, fetching up to `max_workers` ranges of `range_size` bytes
+    at a time, resuming a previous partial download of the same remote file if one
+    exists. Raises DownloadError if the downloaded file fails verification, in which
+    case the partial download is discarded.
+    """
+    mode = "download"
+    part_path = path + ".part"
+    state_path = part_path + ".json"
+
+    size, etag, accepts_ranges = _remote_info(url)
+
+    if not accepts_ranges or not size:
+        cache.spells_print(mode, f"Fetching {url}")
+        _fetch_all(url, part_path)
+    else:
+        done = _read_state(state_path, size, etag)
+        if not done or not os.path.isfile(part_path):
+            done = set()
+            with open(part_path, "wb") as f:
+                f.truncate(size)
+        starts = [start for start in range(0, size, range_size) if start not in done]
+        cache.spells_print(
+            mode,
+            f"Fetching {url} in {len(starts)} ranges"
+            + (f" (resuming, {len(done)} done)" if done else ""),
+        )
+
+        lock = threading.Lock()
+
+        def fetch(start: int):
+            _fetch_range(url, part_path, start, min(start + range_size, size) - 1)
+            with lock:
+                done.add(start)
+                _write_state(state_path, size, etag, done)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for _ in executor.map(fetch, starts):
+                pass
+
+    try:
+        _verify(part_path, size, etag)
+    except DownloadError:
+        os.remove(part_path)
+        if os.path.isfile(state_path):
+            os.remove(state_path)
+        raise
+
+    os.replace(part_path, path)
+    if os.path.isfile(state_path):
+        os.remove(state_path)
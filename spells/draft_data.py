@@ -6,9 +6,15 @@ Aggregate dataframes containing raw counts are cached in the local file system
 for performance.
 """
 
+import datetime
 import functools
 import hashlib
+import math
+import random
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from inspect import signature
 import os
 from typing import Callable, TypeVar, Any
@@ -16,15 +22,19 @@ from typing import Callable, TypeVar, Any
 import polars as pl
 from polars.exceptions import ColumnNotFoundError
 
-from spells import cache
+from spells import cache, kernel
 import spells.filter
 import spells.manifest
 from spells.columns import ColDef, ColSpec, get_specs
 from spells.enums import View, ColName, ColType
+from spells.schema import CATEGORICAL_COLUMNS, parse_timestamps
 
 
 DF = TypeVar("DF", pl.LazyFrame, pl.DataFrame)
 
+# the most sets aggregated at once by a multi-set summon
+MAX_WORKERS = 4
+
 
 def _cache_key(args) -> str:
     """
@@ -35,12 +45,17 @@ def _cache_key(args) -> str:
 
 @functools.lru_cache(maxsize=None)
 def get_names(set_code: str) -> list[str]:
+    catalog = cache.read_catalog(set_code, (View.DRAFT, View.CARD))
+    if catalog is not None:
+        return catalog["names"]
+
     card_fp = cache.data_file_path(set_code, View.CARD)
     card_view = pl.read_parquet(card_fp)
     card_names_set = frozenset(card_view.get_column("name").to_list())
 
-    draft_fp = cache.data_file_path(set_code, View.DRAFT)
-    draft_view = pl.scan_parquet(draft_fp)
+    draft_view = pl.scan_parquet(
+        cache.data_file_paths(set_code, View.DRAFT), hive_partitioning=False
+    )
     cols = draft_view.collect_schema().names()
 
     prefix = "pack_card_"
@@ -105,6 +120,134 @@ def _get_card_context(
     return loaded_context
 
 
+def _name_lookup_expr(
+    condition_col: str, names: list[str], name_exprs: list[pl.Expr | Any]
+) -> pl.Expr:
+    """
+    The expression (or literal value) for each name, chosen by the name in
+    `condition_col`. If every expression is a literal, this is a single lookup of the
+    literals, with a per-row cost independent of the number of names. Otherwise it is
+    a chain of conditionals, since other expressions without columns, like `pl.len()`,
+    depend on the frame they are evaluated in.
+    """
+    name_exprs = [
+        expr if isinstance(expr, pl.Expr) else pl.lit(expr) for expr in name_exprs
+    ]
+    constants = None
+    if all(expr.meta.is_literal(allow_aliasing=True) for expr in name_exprs):
+        try:
+            constants = pl.select(
+                expr.alias(str(index)) for index, expr in enumerate(name_exprs)
+            )
+        except pl.exceptions.PolarsError:
+            pass
+
+    if constants is not None and constants.height == 1:
+        values = pl.concat(
+            [constants.select(pl.col(col).alias("value")) for col in constants.columns],
+            how="vertical_relaxed",
+        )["value"]
+        return pl.col(condition_col).replace_strict(
+            pl.Series(names), values, default=None
+        )
+
+    expr = pl.lit(None)
+    for name, name_expr in zip(names, name_exprs):
+        expr = pl.when(pl.col(condition_col) == name).then(name_expr).otherwise(expr)
+    return expr
+
+
+def _probe_counts(col: str, names: list[str]) -> pl.DataFrame:
+    """
+    Counts of a base name-mapped column to evaluate weighted columns on: none, one,
+    and two random counts of each card with their sum
+    """
+    rng = random.Random(len(names))
+    counts = {}
+    for name in names:
+        u, v = rng.randint(2, 40), rng.randint(2, 40)
+        # wide enough that weights don't overflow, as they could the stored Int8
+        counts[f"{col}_{name}"] = pl.Series([0, 1, u, v, u + v], dtype=pl.Int16)
+    return pl.DataFrame(counts)
+
+
+def _card_weights(
+    col: str,
+    col_def_map: dict[str, ColDef],
+    names: list[str],
+    memo: dict[str, tuple | None],
+) -> tuple[str, dict[str, Any] | None, pl.DataType, pl.DataFrame] | None:
+    """
+    Find name-mapped columns that are a constant per card times a base name-mapped
+    column, like `deck_mana_value`, by evaluating the expression of every card on
+    random counts of the base column, together and row by row, so that expressions of
+    the whole frame, like `pl.len()`, don't pass for linear. Returns the base column,
+    the weight vector (None for a base column itself), the dtype of the sums, and the
+    evaluated counts, or None.
+    """
+    if col in memo:
+        return memo[col]
+    memo[col] = None
+
+    cdef = col_def_map.get(col)
+    if cdef is None or cdef.col_type != ColType.NAME_SUM:
+        return None
+
+    roots = [expr.meta.root_names() for expr in cdef.expr]
+    if all(root == [f"{col}_{name}"] for root, name in zip(roots, names)):
+        memo[col] = (col, None, pl.Int64, _probe_counts(col, names))
+        return memo[col]
+
+    prefixes = set()
+    for root, name in zip(roots, names):
+        for root_col in root:
+            prefix = root_col.removesuffix(f"_{name}")
+            if prefix in (root_col, col):
+                return None
+            prefixes.add(prefix)
+
+    inputs = [_card_weights(prefix, col_def_map, names, memo) for prefix in prefixes]
+    if not inputs or None in inputs or len({inp[0] for inp in inputs}) != 1:
+        return None
+
+    input_df = pl.concat([inp[3] for inp in inputs], how="horizontal")
+    try:
+        probe = input_df.select(cdef.expr)
+        rows = pl.concat(
+            [
+                input_df.slice(index, 1).select(cdef.expr)
+                for index in range(len(input_df))
+            ]
+        )
+        dtype = probe.select(pl.first().sum()).dtypes[0]
+    except pl.exceptions.PolarsError:
+        return None
+
+    counts = _probe_counts(inputs[0][0], names)
+    weights = {}
+    for name, values, row_values, base_counts in zip(
+        names,
+        probe.to_dict(as_series=False).values(),
+        rows.to_dict(as_series=False).values(),
+        counts.to_dict(as_series=False).values(),
+    ):
+        weight = values[1]
+        if not isinstance(weight, (int, float)) or isinstance(weight, bool):
+            return None
+        for value, row_value, count in zip(values, row_values, base_counts):
+            if not (
+                isinstance(value, (int, float))
+                and isinstance(row_value, (int, float))
+                and math.isclose(value, count * weight)
+                and math.isclose(row_value, value)
+            ):
+                return None
+        weights[name] = weight
+
+    memo[col] = (inputs[0][0], weights, dtype, probe)
+    return memo[col]
+
+
 def _determine_expression(
     col: str,
     spec: ColSpec,
@@ -163,14 +306,11 @@ def _determine_expression(
                         if spec.col_type == ColType.PICK_SUM
                         else ColName.NAME
                     )
-                    expr = pl.lit(None)
-                    for name in names:
-                        name_params = {"name": name, **params}
-                        expr = (
-                            pl.when(pl.col(condition_col) == name)
-                            .then(spec.expr(**name_params))
-                            .otherwise(expr)
-                        )
+                    expr = _name_lookup_expr(
+                        condition_col,
+                        names,
+                        [spec.expr(**{"name": name, **params}) for name in names],
+                    )
                 else:
                     expr = spec.expr(**params)
             except KeyError:
@@ -239,7 +379,16 @@ def _get_set_context(
     context_fp = cache.data_file_path(set_code, "context")
 
     context = {}
-    if os.path.isfile(context_fp):
+    catalog = cache.read_catalog(set_code, (View.DRAFT,))
+    # the context file may be recalculated without rewriting the catalog
+    if (
+        catalog is not None
+        and "set_context" in catalog
+        and catalog.get("set_context_fingerprint")
+        == cache.fingerprint(set_code, "context")
+    ):
+        context.update(catalog["set_context"])
+    elif os.path.isfile(context_fp):
         context_df = pl.read_parquet(context_fp)
         if len(context_df) == 1:
             context.update(context_df.to_dicts()[0])
@@ -312,10 +461,11 @@ def _view_select(
     view_cols: frozenset[str],
     col_def_map: dict[str, ColDef],
     is_agg_view: bool,
+    passthrough: tuple[str, ...] = (),
 ) -> DF:
     base_cols = frozenset()
     cdefs = [col_def_map[c] for c in sorted(view_cols)]
-    select = []
+    select = [pl.col(c) for c in passthrough]
     for cdef in cdefs:
         if is_agg_view:
             if cdef.col_type == ColType.AGG:
@@ -335,50 +485,559 @@ def _view_select(
                 select.append(cdef.expr)
 
     if base_cols != view_cols:
-        df = _view_select(df, base_cols, col_def_map, is_agg_view)
+        df = _view_select(df, base_cols, col_def_map, is_agg_view, passthrough)
 
     return df.select(select)
 
 
+def _draft_date_range(
+    m_filter: spells.filter.Filter | None, set_context: dict[str, Any]
+) -> tuple[datetime.date | None, datetime.date | None]:
+    """
+    The inclusive range of draft dates a filter can possibly select, from bounds on
+    the draft date, format day, and format week, used to prune partitioned files
+    """
+    lo, hi = None, None
+    if m_filter is None:
+        return lo, hi
+
+    def tighten(bound_lo, bound_hi):
+        nonlocal lo, hi
+        if isinstance(bound_lo, datetime.datetime):
+            bound_lo = bound_lo.date()
+        if isinstance(bound_hi, datetime.datetime):
+            bound_hi = bound_hi.date()
+        if isinstance(bound_lo, datetime.date):
+            lo = bound_lo if lo is None else max(lo, bound_lo)
+        if isinstance(bound_hi, datetime.date):
+            hi = bound_hi if hi is None else min(hi, bound_hi)
+
+    tighten(*m_filter.bounds.get(ColName.DRAFT_DATE, (None, None)))
+
+    release_date = set_context.get("release_date")
+    if isinstance(release_date, datetime.date):
+        # days after release of the first and last day of each unit
+        for col, first_day, last_day in (
+            (ColName.FORMAT_DAY, lambda d: d - 1, lambda d: d - 1),
+            (ColName.FORMAT_WEEK, lambda w: 7 * (w - 1), lambda w: 7 * w - 1),
+        ):
+            bound_lo, bound_hi = m_filter.bounds.get(col, (None, None))
+            if isinstance(bound_lo, (int, float)):
+                bound_lo = release_date + datetime.timedelta(
+                    days=first_day(math.floor(bound_lo))
+                )
+            if isinstance(bound_hi, (int, float)):
+                bound_hi = release_date + datetime.timedelta(
+                    days=last_day(math.ceil(bound_hi))
+                )
+            tighten(bound_lo, bound_hi)
+
+    return lo, hi
+
+
+def _scan_view(
+    set_code: str,
+    view: View,
+    date_range: tuple[datetime.date | None, datetime.date | None] = (None, None),
+) -> pl.LazyFrame:
+    paths = cache.data_file_paths(set_code, view, *date_range)
+    if paths:
+        lf = pl.scan_parquet(paths, hive_partitioning=False)
+    else:
+        lf = pl.scan_parquet(
+            cache.data_file_paths(set_code, view), hive_partitioning=False
+        ).clear()
+
+    schema = lf.collect_schema()
+
+    # polars 1.14 mis-reads predicates pushed into the reader of several files, where
+    # a file without matching rows keeps its column order and fails to stack, and of
+    # categorical columns with nulls, written by earlier versions until rewritten by
+    # `spells reconvert`. A slice keeps predicates above the scan and lets projections
+    # in, and partitions are still pruned by `date_range`.
+    pushdown = len(paths) <= 1 and pl.Categorical not in schema.values()
+    if not pushdown:
+        lf = lf.slice(0)
+
+    # files written before timestamps were typed at ingest are parsed here instead
+    lf = lf.with_columns(parse_timestamps(schema))
+
+    # typed timestamps carry parquet statistics, so a predicate on the raw column lets
+    # the reader skip row groups outside the date range
+    start, end = date_range
+    if pushdown and schema.get(ColName.DRAFT_TIME) == pl.Datetime:
+        if start is not None:
+            lf = lf.filter(
+                pl.col(ColName.DRAFT_TIME)
+                >= datetime.datetime.combine(start, datetime.time())
+            )
+        if end is not None:
+            lf = lf.filter(
+                pl.col(ColName.DRAFT_TIME)
+                < datetime.datetime.combine(
+                    end + datetime.timedelta(days=1), datetime.time()
+                )
+            )
+
+    # the low-cardinality strings of sets added with `--categorical` are encoded once
+    # read, picks against the card list, so that name groupings hash integers
+    if cache.is_categorical(cache.read_catalog(set_code)):
+        lf = lf.with_columns(
+            pl.col(col).cast(
+                pl.Enum(get_names(set_code)) if col == ColName.PICK else pl.Categorical
+            )
+            for col in CATEGORICAL_COLUMNS
+            if col in schema
+        )
+    return lf
+
+
+def _decode(df: DF) -> DF:
+    """
+    Aggregates are cached and joined across views as strings
+    """
+    return df.with_columns(pl.col(pl.Categorical, pl.Enum).cast(pl.String))
+
+
 def _fetch_or_cache(
     calc_fn: Callable,
     set_code: str,
     cache_args,
     read_cache: bool = True,
     write_cache: bool = True,
+    date_range: tuple[datetime.date | None, datetime.date | None] = (None, None),
+    lazy: bool = False,
+    meta: dict | None = None,
 ):
+    """
+    With `lazy`, `calc_fn` returns a plan, which is not cached, and a cached result is
+    scanned rather than read. `meta` is recorded in the cache index with the result.
+    """
     key = _cache_key(cache_args)
 
     if read_cache:
         if cache.cache_exists(set_code, key):
+            cache.record_hit(set_code, key)
+            if lazy:
+                return cache.scan_cache(set_code, key)
             return cache.read_cache(set_code, key)
 
     df = calc_fn()
 
-    if write_cache:
-        cache.write_cache(set_code, key, df)
+    if write_cache and not lazy:
+        cache.write_cache(set_code, key, df, date_range=date_range, meta=meta)
 
     return df
 
 
-def _base_agg_df(
+def _base_sum_cols(m: spells.manifest.Manifest) -> tuple[str, ...]:
+    return tuple(
+        sorted(
+            col
+            for view in (View.DRAFT, View.GAME)
+            for col in m.view_cols.get(view, ())
+            if m.col_def_map[col].col_type in BASE_SUM_TYPES
+        )
+    )
+
+
+def _cache_meta(m: spells.manifest.Manifest, filter_spec: dict | None) -> dict:
+    """
+    The group by, filter and column signatures of a cached base aggregate, from which
+    coarser queries can be rolled up
+    """
+    filter_cols = m.filter.lhs if m.filter is not None else frozenset()
+    return {
+        "group_by": sorted(m.base_view_group_by),
+        "filter": filter_spec,
+        "columns": _signatures(
+            m, m.base_view_group_by.union(_base_sum_cols(m), filter_cols)
+        ),
+    }
+
+
+def _cached_parts(
+    set_code: str, m: spells.manifest.Manifest, filter_spec: dict | None
+) -> dict[str, tuple[bool, tuple[str, ...]]]:
+    """
+    Cached base aggregates with the same filter or none and at least as fine a group by,
+    from which base columns of the manifest can be rolled up, by key, with whether each
+    is already filtered and the columns taken from it. The aggregate with the most
+    columns still missing is taken first, the smallest one on ties.
+    """
+    missing = set(_base_sum_cols(m))
+    candidates = {}
+    for key, entry in cache.read_cache_index(set_code).items():
+        # entries written before the index recorded their group by can't be used
+        if "group_by" not in entry or not cache.cache_exists(set_code, key):
+            continue
+        filtered = entry["filter"] == filter_spec
+        if not filtered and entry["filter"] is not None:
+            continue
+        cols = _roll_up_cols(entry, m, missing, filtered=filtered)
+        if cols:
+            size = os.path.getsize(cache.cache_path_for_key(set_code, key))
+            candidates[key] = (size, filtered, frozenset(cols))
+
+    parts = {}
+    while missing and candidates:
+        key = max(
+            candidates,
+            key=lambda k: (len(candidates[k][2] & missing), -candidates[k][0]),
+        )
+        _, filtered, cols = candidates.pop(key)
+        if not cols & missing:
+            break
+        parts[key] = (filtered, tuple(sorted(cols & missing)))
+        missing -= cols
+    return parts
+
+
+def _missing_manifest(
+    m: spells.manifest.Manifest, parts: dict[str, tuple[bool, tuple[str, ...]]]
+) -> spells.manifest.Manifest | None:
+    """
+    The manifest of the base columns not taken from cached `parts`, if any
+    """
+    taken = frozenset(col for _, cols in parts.values() for col in cols)
+    if taken.issuperset(_base_sum_cols(m)):
+        return None
+    return replace(
+        m, view_cols={view: cols - taken for view, cols in m.view_cols.items()}
+    )
+
+
+def _cached_parts_plans(
+    set_code: str,
+    m: spells.manifest.Manifest,
+    parts: dict[str, tuple[bool, tuple[str, ...]]],
+) -> dict[str, pl.LazyFrame]:
+    return {
+        f"cache_{key}": _roll_up(cache.scan_cache(set_code, key), m, cols, filtered)
+        for key, (filtered, cols) in parts.items()
+    }
+
+
+def _assembled_agg(
     set_code: str,
     m: spells.manifest.Manifest,
+    parts: dict[str, tuple[bool, tuple[str, ...]]],
     use_streaming: bool = False,
-) -> pl.DataFrame:
-    join_dfs = []
+    set_context: dict[str, Any] | None = None,
+    lazy: bool = False,
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    The base aggregate of the manifest with the columns of cached `parts` rolled up to
+    its group by, and only the other base columns calculated
+    """
+    plans = list(_cached_parts_plans(set_code, m, parts).values())
+    for key in parts:
+        cache.record_hit(set_code, key)
+    missing_m = _missing_manifest(m, parts)
+    if missing_m is not None:
+        if lazy:
+            plans.append(_base_agg_lf(set_code, missing_m, set_context=set_context))
+        else:
+            missing_df = _base_agg_df(
+                set_code,
+                missing_m,
+                use_streaming=use_streaming,
+                set_context=set_context,
+            )
+            plans.append(missing_df.lazy())
+
+    assembled = _join_plans(plans, m.base_view_group_by)
+    return assembled if lazy else assembled.collect()
+
+
+def _sparse_name_sum_df(
+    set_code: str,
+    view: View,
+    cols: tuple[str, ...],
+    base_df: pl.LazyFrame,
+    nonname_gb: tuple[str, ...],
+    is_name_gb: bool,
+    weights: dict[str, tuple] | None = None,
+) -> pl.LazyFrame:
+    """
+    Sum name-mapped base columns from the sparse card table of the view, joined to
+    the filtered rows by row id, so that the cost scales with the number of nonzero
+    card counts rather than rows times cards. Columns in `weights` are summed from
+    their base column, with each count times the weight of its card.
+    """
+    weights = weights or {}
+    prefixes = tuple({weights[col][0] if col in weights else col for col in cols})
+    sparse_df = (
+        pl.scan_parquet(cache.data_file_path(set_code, f"{view}_sparse"))
+        .with_columns(pl.col("prefix", ColName.NAME).cast(pl.String))
+        .filter(pl.col("prefix").is_in(prefixes))
+    )
+    row_df = base_df.select((cache.ROW_ID,) + nonname_gb)
+    gb = nonname_gb + ((ColName.NAME,) if is_name_gb else ())
+
+    joined = sparse_df.join(row_df, on=cache.ROW_ID)
+    sums = []
+    for col in cols:
+        if col in weights:
+            base, card_weights, dtype, _ = weights[col]
+            weighted = pl.col("count") * pl.col(ColName.NAME).replace_strict(
+                card_weights
+            )
+            sums.append(
+                weighted.filter(pl.col("prefix") == base).sum().cast(dtype).alias(col)
+            )
+        else:
+            sums.append(
+                pl.col("count").filter(pl.col("prefix") == col).sum().alias(col)
+            )
+    agg_df = joined.group_by(gb).agg(sums) if gb else joined.select(sums)
+    if not gb:
+        return agg_df
+
+    # the dense path has a row for every name in every group, even if zero
+    groups_df = row_df.select(nonname_gb).unique()
+    if is_name_gb:
+        names_df = pl.LazyFrame({ColName.NAME: get_names(set_code)})
+        groups_df = groups_df.join(names_df, how="cross") if nonname_gb else names_df
+
+    return groups_df.join(agg_df, on=gb, how="left", join_nulls=True).with_columns(
+        pl.col(cols).fill_null(0)
+    )
+
+
+def _name_sum_df(
+    set_code: str,
+    cols: tuple[str, ...],
+    base_df: pl.LazyFrame,
+    nonname_gb: tuple[str, ...],
+    is_name_gb: bool,
+    weights: dict[str, tuple] | None = None,
+) -> pl.LazyFrame:
+    """
+    Sum all the name-mapped columns `cols` of a view in one pass over the filtered
+    rows. Grouped by name, the sums are reshaped to a row per group and name with a
+    single unpivot of every column, pivoted back out by column.
+
+    Columns in `weights`, a constant per card times a base column, are not computed per
+    row. The sums of the base column are weighted by card instead, since the sum of
+    the weighted counts is the weighted sum of the counts.
+    """
+    weights = weights or {}
+    names = get_names(set_code)
+    agg_cols = tuple(dict.fromkeys(weights[c][0] if c in weights else c for c in cols))
+    name_cols = {(col, name): f"{col}_{name}" for col in agg_cols for name in names}
+
+    pre_agg_df = base_df.select(nonname_gb + tuple(name_cols.values()))
+    agg_df = pre_agg_df.group_by(nonname_gb).sum() if nonname_gb else pre_agg_df.sum()
+
+    if not is_name_gb:
+        return agg_df.select(
+            nonname_gb
+            + tuple(
+                kernel.weighted_sum(weights[col][0], weights[col][1])
+                .cast(weights[col][2])
+                .alias(col)
+                if col in weights
+                else pl.sum_horizontal(name_cols[(col, name)] for name in names).alias(
+                    col
+                )
+                for col in cols
+            )
+        )
+
+    # the unpivot casts to a common supertype
+    agg_schema = agg_df.collect_schema()
+    dtypes = {col: agg_schema[name_cols[(col, names[0])]] for col in agg_cols}
+
+    unpivoted = agg_df.unpivot(
+        index=nonname_gb or None, value_name="value", variable_name="name_col"
+    ).with_columns(
+        pl.col("name_col")
+        .replace_strict({v: col for (col, _), v in name_cols.items()})
+        .alias("col"),
+        pl.col("name_col")
+        .replace_strict({v: name for (_, name), v in name_cols.items()})
+        .alias(ColName.NAME),
+    )
+    reshaped = unpivoted.group_by(
+        nonname_gb + (ColName.NAME,), maintain_order=True
+    ).agg(
+        pl.col("value").filter(pl.col("col") == col).first().cast(dtype).alias(col)
+        for col, dtype in dtypes.items()
+    )
+    return reshaped.select(
+        nonname_gb
+        + (ColName.NAME,)
+        + tuple(
+            (
+                pl.col(weights[col][0])
+                * pl.col(ColName.NAME).replace_strict(weights[col][1])
+            )
+            .cast(weights[col][2])
+            .alias(col)
+            if col in weights
+            else pl.col(col)
+            for col in cols
+        )
+    )
+
+
+BASE_SUM_TYPES = (ColType.PICK_SUM, ColType.GAME_SUM, ColType.NAME_SUM)
+
+
+def _signatures(m: spells.manifest.Manifest, cols) -> dict[str, str]:
+    """
+    Hashed signatures of columns and of every column they depend on, recorded with
+    pre-aggregated sums to check that they still apply
+    """
+    signatures = {}
+    stack = list(cols)
+    while stack:
+        col = stack.pop()
+        if col in signatures or col not in m.col_def_map:
+            continue
+        signatures[col] = _cache_key(m.col_def_map[col].signature)
+        stack.extend(m.col_def_map[col].dependencies)
+    return signatures
+
+
+def _roll_up_cols(
+    meta: dict, m: spells.manifest.Manifest, sum_cols, filtered: bool = False
+) -> tuple[str, ...]:
+    """
+    The columns of `sum_cols` that can be rolled up to the group by of the manifest from
+    base sums pre-aggregated by the columns `meta["group_by"]`, with the column
+    signatures `meta["columns"]`. If not already `filtered`, the manifest filter must be
+    on grouped columns too. Either way the filter columns must have the same signatures,
+    since the same filter on a column defined differently, e.g. `format_day` of another
+    release date, selects other rows.
+    """
+    grain = frozenset(meta["group_by"])
+    filter_cols = m.filter.lhs if m.filter is not None else frozenset()
+    if not m.base_view_group_by <= grain or not (
+        filtered or filter_cols <= grain - {ColName.NAME}
+    ):
+        return ()
+
+    def matches(cols):
+        return all(
+            meta["columns"].get(col) == signature
+            for col, signature in _signatures(m, cols).items()
+        )
+
+    if not matches(m.base_view_group_by.union(filter_cols)):
+        return ()
+    return tuple(col for col in sum_cols if matches((col,)))
+
+
+def _roll_up(
+    lf: pl.LazyFrame,
+    m: spells.manifest.Manifest,
+    sum_cols,
+    filtered: bool = False,
+) -> pl.LazyFrame:
+    """
+    Re-aggregate pre-aggregated base sums to the group by of the manifest, filtering
+    them first unless already `filtered`
+    """
+    if m.filter is not None and not filtered:
+        lf = lf.filter(m.filter.expr)
+    # the null name groups picks of no card, which only sums of picks and games have
+    if ColName.NAME in m.base_view_group_by and not any(
+        m.col_def_map[col].col_type in (ColType.PICK_SUM, ColType.GAME_SUM)
+        for col in sum_cols
+    ):
+        lf = lf.filter(pl.col(ColName.NAME).is_not_null())
+    # sums that are null throughout a group stay null, as when summed from the rows
+    sums = tuple(
+        pl.when(pl.col(col).is_not_null().any()).then(pl.col(col).sum()).alias(col)
+        for col in sum_cols
+    )
+    group_by = sorted(m.base_view_group_by)
+    return lf.group_by(group_by).agg(sums) if group_by else lf.select(sums)
+
+
+def _cube_plan(
+    set_code: str,
+    view: View,
+    m: spells.manifest.Manifest,
+    cols_for_view: frozenset[str],
+) -> pl.LazyFrame | None:
+    """
+    The partial aggregate of a view rolled up from its base cube, if the cube is current
+    and can be rolled up to the manifest
+    """
+    meta = cache.read_cube_meta(set_code, view)
+    if meta is None or meta["fingerprint"] != cache.fingerprint(set_code, view):
+        return None
+
+    sum_cols = tuple(
+        c for c in cols_for_view if m.col_def_map[c].col_type in BASE_SUM_TYPES
+    )
+    if len(_roll_up_cols(meta, m, sum_cols)) < len(sum_cols):
+        return None
+    return _roll_up(pl.scan_parquet(cache.cube_path(set_code, view)), m, sum_cols)
+
+
+def _base_agg_plans(
+    set_code: str,
+    m: spells.manifest.Manifest,
+    set_context: dict[str, Any] | None = None,
+) -> dict[str, pl.LazyFrame]:
+    """
+    The plans of the partial aggregates of every view, with disjoint value columns,
+    labeled by view and kind of sum
+    """
+    agg_plans = {}
     group_by = m.base_view_group_by
+    date_range = _draft_date_range(m.filter, set_context or {})
 
     is_name_gb = ColName.NAME in group_by
     nonname_gb = tuple(gb for gb in group_by if gb != ColName.NAME)
 
+    names = get_names(set_code)
+    memo = {}
+
     for view, cols_for_view in m.view_cols.items():
         if view == View.CARD:
             continue
-        df_path = cache.data_file_path(set_code, view)
-        base_view_df = pl.scan_parquet(df_path)
+        cube_plan = _cube_plan(set_code, view, m, cols_for_view)
+        if cube_plan is not None:
+            agg_plans[f"{view}_cube"] = cube_plan
+            continue
+
+        name_sum_cols = tuple(
+            c for c in cols_for_view if m.col_def_map[c].col_type == ColType.NAME_SUM
+        )
+        # columns weighting a base column of the view by card are summed from it
+        weights = {}
+        for c in name_sum_cols:
+            card_weights = _card_weights(c, m.col_def_map, names, memo)
+            if (
+                card_weights is not None
+                and card_weights[1] is not None
+                and view in m.col_def_map[card_weights[0]].views
+            ):
+                weights[c] = card_weights
+        bases = {c: weights[c][0] if c in weights else c for c in name_sum_cols}
+
+        # base name-mapped columns can be summed from the sparse card table
+        sparse_cols = ()
+        if os.path.exists(cache.data_file_path(set_code, f"{view}_sparse")):
+            sparse_cols = tuple(
+                c
+                for c in name_sum_cols
+                if bases[c] in cache.SPARSE_PREFIXES
+                and view in m.col_def_map[bases[c]].views
+            )
+
+        base_view_df = _scan_view(set_code, view, date_range)
         base_df_prefilter = _view_select(
-            base_view_df, cols_for_view, m.col_def_map, is_agg_view=False
+            base_view_df,
+            cols_for_view.difference(weights).union(bases.values()),
+            m.col_def_map,
+            is_agg_view=False,
+            passthrough=(cache.ROW_ID,) if sparse_cols else (),
         )
 
         if m.filter is not None:
@@ -400,51 +1059,400 @@ def _base_agg_df(
             sum_col_df = base_df.select(nonname_gb + name_col_tuple + sum_cols)
 
             grouped = sum_col_df.group_by(group_by) if group_by else sum_col_df
-            join_dfs.append(grouped.sum().collect(streaming=use_streaming))
+            agg_plans[f"{view}_sum"] = grouped.sum()
+
+        if sparse_cols:
+            agg_plans[f"{view}_sparse_name_sum"] = _sparse_name_sum_df(
+                set_code,
+                view,
+                sparse_cols,
+                base_df,
+                nonname_gb,
+                is_name_gb,
+                weights,
+            )
 
-        name_sum_cols = tuple(
-            c for c in cols_for_view if m.col_def_map[c].col_type == ColType.NAME_SUM
+        dense_cols = tuple(c for c in name_sum_cols if c not in sparse_cols)
+        if dense_cols:
+            agg_plans[f"{view}_name_sum"] = _name_sum_df(
+                set_code, dense_cols, base_df, nonname_gb, is_name_gb, weights
+            )
+
+    return agg_plans
+
+
+def _join_aggs(agg_dfs: list[pl.DataFrame], group_by: tuple[str, ...]) -> pl.DataFrame:
+    """
+    Combine the partial aggregates by concatenating and grouping on the group by
+    columns
+    """
+    if group_by:
+        # each group appears once in each partial aggregate
+        joined_df = (
+            pl.concat(agg_dfs, how="diagonal_relaxed")
+            .group_by(group_by, maintain_order=True)
+            .agg(pl.exclude(group_by).drop_nulls().first())
         )
-        for col in name_sum_cols:
-            names = get_names(set_code)
-            expr = tuple(pl.col(f"{col}_{name}").alias(name) for name in names)
+    else:
+        joined_df = pl.concat(agg_dfs, how="horizontal")
 
-            pre_agg_df = base_df.select(expr + nonname_gb)
+    return joined_df.select(sorted(joined_df.schema.names()))
 
-            if nonname_gb:
-                agg_df = pre_agg_df.group_by(nonname_gb).sum()
-            else:
-                agg_df = pre_agg_df.sum()
 
-            index = nonname_gb if nonname_gb else None
-            unpivoted = agg_df.unpivot(
-                index=index,
-                value_name=col,
-                variable_name=ColName.NAME,
-            )
+def _base_agg_df(
+    set_code: str,
+    m: spells.manifest.Manifest,
+    use_streaming: bool = False,
+    set_context: dict[str, Any] | None = None,
+) -> pl.DataFrame:
+    """
+    Build the aggregation plans of every view first and execute them together, so that
+    polars can share the scans and run them in parallel.
+    """
+    agg_plans = _base_agg_plans(set_code, m, set_context=set_context)
+    # entered per call, a shared decorator instance is not safe across threads
+    with pl.StringCache():
+        agg_dfs = [
+            _decode(df)
+            for df in pl.collect_all(agg_plans.values(), streaming=use_streaming)
+        ]
+    return _join_aggs(agg_dfs, m.base_view_group_by)
 
-            if not is_name_gb:
-                grouped = (
-                    unpivoted.drop("name").group_by(nonname_gb)
-                    if nonname_gb
-                    else unpivoted.drop("name")
-                )
-                df = grouped.sum().collect(streaming=use_streaming)
-            else:
-                df = unpivoted.collect(streaming=use_streaming)
 
-            join_dfs.append(df)
+def _base_agg_lf(
+    set_code: str,
+    m: spells.manifest.Manifest,
+    set_context: dict[str, Any] | None = None,
+) -> pl.LazyFrame:
+    """
+    The aggregation plans of every view joined into one plan, for the caller to collect.
+    The partial aggregates are joined on the group by columns rather than concatenated,
+    since a lazy concatenation casts to the planned schema, and polars plans some
+    integer products narrower than they turn out.
+    """
+    agg_plans = [
+        _decode(lf)
+        for lf in _base_agg_plans(set_code, m, set_context=set_context).values()
+    ]
+    return _join_plans(agg_plans, m.base_view_group_by)
 
+
+def _join_plans(
+    plans: list[pl.LazyFrame], group_by: frozenset[str] | tuple[str, ...]
+) -> pl.LazyFrame:
+    """
+    Join partial aggregates with disjoint value columns on the group by columns
+    """
+    group_by = list(group_by)
     if group_by:
-        joined_df = functools.reduce(
-            lambda prev, curr: prev.join(curr, on=group_by, how="outer", coalesce=True),
-            join_dfs,
+        joined_lf = functools.reduce(
+            lambda left, right: left.join(
+                right, on=group_by, how="full", coalesce=True, join_nulls=True
+            ),
+            plans,
         )
     else:
-        joined_df = pl.concat(join_dfs, how="horizontal")
+        joined_lf = pl.concat(plans, how="horizontal")
+
+    return joined_lf.select(sorted(joined_lf.collect_schema().names()))
+
+
+def write_cube(set_code: str, group_by: list[str] | None = None) -> int:
+    """
+    Write the base cube of each view of a set, the sums of every built-in base sum
+    column of the view grouped by the columns of `group_by` in the view, from which
+    `summon` rolls up any coarser group by and filter on those columns. `group_by`
+    defaults to the configured grain, see `cache.cube_group_by`. GAME_SUM columns are
+    left out of a cube grouped by name.
+    """
+    mode = "cube"
+    group_by = group_by or cache.cube_group_by() or list(cache.DEFAULT_CUBE_GROUP_BY)
+
+    col_def_map = _hydrate_col_defs(set_code, get_specs())
+    set_context = _get_set_context(set_code, None)
 
-    joined_df = joined_df.select(sorted(joined_df.schema.names()))
-    return joined_df
+    def views_of(col):
+        return spells.manifest._resolve_view_cols(frozenset({col}), col_def_map).keys()
+
+    for view in (View.DRAFT, View.GAME):
+        if not os.path.exists(cache.data_file_path(set_code, view)):
+            continue
+        dims = [col for col in group_by if col == ColName.NAME or view in views_of(col)]
+        cols = [
+            col
+            for col, cdef in col_def_map.items()
+            if cdef.col_type in BASE_SUM_TYPES
+            and view in views_of(col)
+            and not (cdef.col_type == ColType.GAME_SUM and ColName.NAME in dims)
+        ]
+        col_set = frozenset(cols).union(dims) - {ColName.NAME}
+        m = spells.manifest.Manifest(
+            columns=tuple(cols),
+            col_def_map=col_def_map,
+            base_view_group_by=frozenset(dims),
+            view_cols={
+                view: spells.manifest._resolve_view_cols(col_set, col_def_map)[view]
+            },
+            group_by=tuple(dims),
+            filter=None,
+        )
+
+        cache.spells_print(
+            mode, f"Summing {len(cols)} {view} columns by {', '.join(dims)}"
+        )
+        cube_df = _base_agg_df(set_code, m, set_context=set_context)
+        cache.write_cube(
+            set_code,
+            view,
+            cube_df,
+            dims,
+            _signatures(m, cols + dims),
+        )
+        cache.spells_print(
+            mode,
+            f"Wrote {cube_df.height} rows to {cache.cube_path(set_code, view)}",
+        )
+
+    return 0
+
+
+def _set_manifest(
+    code: str,
+    specs: dict[str, ColSpec],
+    columns: list[str] | None,
+    group_by: list[str] | None,
+    filter_spec: dict | None,
+    card_context: pl.DataFrame | dict[str, Any] | None,
+    set_context: pl.DataFrame | dict[str, Any] | None,
+) -> tuple[spells.manifest.Manifest, dict[str, Any]]:
+    """
+    The manifest of one set and its hydrated set context
+    """
+    if isinstance(card_context, pl.DataFrame):
+        set_card_context = card_context.filter(pl.col("expansion") == code)
+    elif isinstance(card_context, dict):
+        set_card_context = card_context[code]
+    else:
+        set_card_context = None
+
+    if isinstance(set_context, pl.DataFrame):
+        this_set_context = set_context.filter(pl.col("expansion") == code)
+    elif isinstance(set_context, dict):
+        this_set_context = set_context[code]
+    else:
+        this_set_context = None
+
+    col_def_map = _hydrate_col_defs(code, specs, set_card_context, this_set_context)
+    m = spells.manifest.create(col_def_map, columns, group_by, filter_spec)
+    return m, _get_set_context(code, this_set_context)
+
+
+def _cache_args(code: str, m: spells.manifest.Manifest, filter_spec: dict | None):
+    return (
+        code,
+        sorted(m.view_cols.get(View.DRAFT, set())),
+        sorted(m.view_cols.get(View.GAME, set())),
+        sorted(c.signature or "" for c in m.col_def_map.values()),
+        sorted(m.base_view_group_by),
+        filter_spec,
+    )
+
+
+def _summon_set(
+    code: str,
+    specs: dict[str, ColSpec],
+    columns: list[str] | None,
+    group_by: list[str] | None,
+    filter_spec: dict | None,
+    use_streaming: bool,
+    read_cache: bool,
+    write_cache: bool,
+    card_context: pl.DataFrame | dict[str, Any] | None,
+    set_context: pl.DataFrame | dict[str, Any] | None,
+    lazy: bool = False,
+) -> tuple[pl.DataFrame | pl.LazyFrame, spells.manifest.Manifest]:
+    """
+    The summed base aggregate of one set, joined to the card view, and its manifest
+    """
+    m, hydrated_set_context = _set_manifest(
+        code, specs, columns, group_by, filter_spec, card_context, set_context
+    )
+
+    if lazy:
+        calc_fn = functools.partial(
+            _base_agg_lf, code, m, set_context=hydrated_set_context
+        )
+    else:
+        calc_fn = functools.partial(
+            _base_agg_df,
+            code,
+            m,
+            use_streaming=use_streaming,
+            set_context=hydrated_set_context,
+        )
+    # base columns already cached at the same or a finer grain are rolled up rather
+    # than calculated again
+    parts = _cached_parts(code, m, filter_spec) if read_cache else {}
+    if parts:
+        calc_fn = functools.partial(
+            _assembled_agg,
+            code,
+            m,
+            parts,
+            use_streaming=use_streaming,
+            set_context=hydrated_set_context,
+            lazy=lazy,
+        )
+
+    agg_df = _fetch_or_cache(
+        calc_fn,
+        code,
+        _cache_args(code, m, filter_spec),
+        read_cache=read_cache,
+        write_cache=write_cache,
+        date_range=_draft_date_range(m.filter, hydrated_set_context),
+        lazy=lazy,
+        meta=_cache_meta(m, filter_spec),
+    )
+
+    if View.CARD in m.view_cols:
+        card_cols = m.view_cols[View.CARD].union({ColName.NAME})
+        fp = cache.data_file_path(code, View.CARD)
+        card_df = pl.scan_parquet(fp) if lazy else pl.read_parquet(fp)
+        select_df = _view_select(card_df, card_cols, m.col_def_map, is_agg_view=False)
+        agg_df = agg_df.join(select_df, on="name", how="full", coalesce=True)
+
+    return agg_df, m
+
+
+@dataclass
+class SetExplanation:
+    """
+    How the base aggregate of one set is found: the cache key and whether it is cached,
+    or else the columns rolled up from each cached aggregate, and the optimized plan of
+    each partial aggregate, with the number of physical columns it scans of each file
+    and, when profiled, the seconds it takes to collect
+    """
+
+    set_code: str
+    cache_key: str
+    cache_hit: bool
+    draft_date_range: tuple[datetime.date | None, datetime.date | None]
+    plans: dict[str, str]
+    scanned_columns: dict[str, dict[str, tuple[int, int]]]
+    timings: dict[str, float] = field(default_factory=dict)
+    cached_parts: dict[str, tuple[str, ...]] = field(default_factory=dict)
+
+
+@dataclass
+class Explanation:
+    """
+    The result of `summon(..., explain=True)`, printable as a report
+    """
+
+    manifest: spells.manifest.Manifest
+    filter_spec: dict | None
+    sets: list[SetExplanation]
+
+    def __str__(self) -> str:
+        m = self.manifest
+        lines = [
+            f"columns: {', '.join(m.columns)}",
+            f"group by: {', '.join(m.group_by)}",
+            f"filter: {self.filter_spec}",
+        ]
+        for view, cols in m.view_cols.items():
+            lines.append(f"{view} columns ({len(cols)}): {', '.join(sorted(cols))}")
+        for exp in self.sets:
+            lines.append("")
+            lines.append(
+                f"{exp.set_code}: cache key {exp.cache_key} "
+                + ("(hit)" if exp.cache_hit else "(miss)")
+                + "".join(
+                    f", {len(cols)} columns rolled up from {key}"
+                    for key, cols in exp.cached_parts.items()
+                )
+                + f", draft dates {exp.draft_date_range[0]} to "
+                + f"{exp.draft_date_range[1]}"
+            )
+            for label, plan in exp.plans.items():
+                scans = ", ".join(
+                    f"{os.path.basename(path)} {projected}/{total} columns"
+                    for path, (projected, total) in exp.scanned_columns[label].items()
+                )
+                timing = (
+                    f" in {exp.timings[label]:.2f}s" if label in exp.timings else ""
+                )
+                lines.append(f"  {label}: scans {scans}{timing}")
+                lines.extend("    " + line for line in plan.splitlines())
+        return "\n".join(lines)
+
+
+_SCAN_PATTERN = re.compile(
+    r"SCAN \[(?P<paths>[^\]]*)\]\s*\n\s*PROJECT (?P<projected>\*|\d+)/(?P<total>\d+) COLUMNS"
+)
+
+
+def _scanned_columns(plan: str) -> dict[str, tuple[int, int]]:
+    """
+    The number of columns projected out of the total by the scans of an optimized plan,
+    summed by scanned file
+    """
+    scanned = {}
+    for match in _SCAN_PATTERN.finditer(plan):
+        total = int(match["total"])
+        projected = total if match["projected"] == "*" else int(match["projected"])
+        prev_projected, _ = scanned.get(match["paths"], (0, total))
+        scanned[match["paths"]] = (prev_projected + projected, total)
+    return scanned
+
+
+def _explain_set(
+    code: str,
+    specs: dict[str, ColSpec],
+    columns: list[str] | None,
+    group_by: list[str] | None,
+    filter_spec: dict | None,
+    read_cache: bool,
+    card_context: pl.DataFrame | dict[str, Any] | None,
+    set_context: pl.DataFrame | dict[str, Any] | None,
+    profile: bool = False,
+) -> tuple[SetExplanation, spells.manifest.Manifest]:
+    m, hydrated_set_context = _set_manifest(
+        code, specs, columns, group_by, filter_spec, card_context, set_context
+    )
+    key = _cache_key(_cache_args(code, m, filter_spec))
+    cache_hit = read_cache and cache.cache_exists(code, key)
+    parts = _cached_parts(code, m, filter_spec) if read_cache and not cache_hit else {}
+    agg_plans = _cached_parts_plans(code, m, parts)
+    missing_m = _missing_manifest(m, parts)
+    if missing_m is not None:
+        agg_plans.update(
+            _base_agg_plans(code, missing_m, set_context=hydrated_set_context)
+        )
+
+    plans = {label: lf.explain() for label, lf in agg_plans.items()}
+    timings = {}
+    if profile:
+        with pl.StringCache():
+            for label, lf in agg_plans.items():
+                start = time.perf_counter()
+                lf.collect()
+                timings[label] = time.perf_counter() - start
+
+    explanation = SetExplanation(
+        set_code=code,
+        cache_key=key,
+        cache_hit=cache_hit,
+        draft_date_range=_draft_date_range(m.filter, hydrated_set_context),
+        plans=plans,
+        scanned_columns={
+            label: _scanned_columns(plan) for label, plan in plans.items()
+        },
+        timings=timings,
+        cached_parts={key: cols for key, (_, cols) in parts.items()},
+    )
+    return explanation, m
 
 
 def summon(
@@ -458,7 +1466,10 @@ def summon(
     write_cache: bool = True,
     card_context: pl.DataFrame | dict[str, Any] | None = None,
     set_context: pl.DataFrame | dict[str, Any] | None = None,
-) -> pl.DataFrame:
+    max_workers: int = MAX_WORKERS,
+    lazy: bool = False,
+    explain: bool | str = False,
+) -> pl.DataFrame | pl.LazyFrame | Explanation:
     specs = get_specs()
 
     if extensions is not None:
@@ -478,58 +1489,55 @@ def summon(
 
     assert codes, "Please ask for at least one set"
 
-    m = None
-
-    concat_dfs = []
-    for code in codes:
-        if isinstance(card_context, pl.DataFrame):
-            set_card_context = card_context.filter(pl.col("expansion") == code)
-        elif isinstance(card_context, dict):
-            set_card_context = card_context[code]
-        else:
-            set_card_context = None
-
-        if isinstance(set_context, pl.DataFrame):
-            this_set_context = set_context.filter(pl.col("expansion") == code)
-        elif isinstance(set_context, dict):
-            this_set_context = set_context[code]
-        else:
-            this_set_context = None
-
-        col_def_map = _hydrate_col_defs(code, specs, set_card_context, this_set_context)
-        m = spells.manifest.create(col_def_map, columns, group_by, filter_spec)
-
-        calc_fn = functools.partial(_base_agg_df, code, m, use_streaming=use_streaming)
-        agg_df = _fetch_or_cache(
-            calc_fn,
-            code,
-            (
+    if explain:
+        explained = [
+            _explain_set(
                 code,
-                sorted(m.view_cols.get(View.DRAFT, set())),
-                sorted(m.view_cols.get(View.GAME, set())),
-                sorted(c.signature or "" for c in m.col_def_map.values()),
-                sorted(m.base_view_group_by),
+                specs,
+                columns,
+                group_by,
                 filter_spec,
-            ),
-            read_cache=read_cache,
-            write_cache=write_cache,
+                read_cache,
+                card_context,
+                set_context,
+                profile=explain == "profile",
+            )
+            for code in codes
+        ]
+        return Explanation(
+            manifest=explained[-1][1],
+            filter_spec=filter_spec,
+            sets=[exp for exp, _ in explained],
         )
 
-        if View.CARD in m.view_cols:
-            card_cols = m.view_cols[View.CARD].union({ColName.NAME})
-            fp = cache.data_file_path(code, View.CARD)
-            card_df = pl.read_parquet(fp)
-            select_df = _view_select(
-                card_df, card_cols, m.col_def_map, is_agg_view=False
-            )
-            agg_df = agg_df.join(select_df, on="name", how="outer", coalesce=True)
-        concat_dfs.append(agg_df)
+    summon_set = functools.partial(
+        _summon_set,
+        specs=specs,
+        columns=columns,
+        group_by=group_by,
+        filter_spec=filter_spec,
+        use_streaming=use_streaming,
+        read_cache=read_cache,
+        write_cache=write_cache,
+        card_context=card_context,
+        set_context=set_context,
+        lazy=lazy,
+    )
+    if lazy:
+        # nothing is collected, so there is nothing to parallelize
+        results = [summon_set(code) for code in codes]
+    else:
+        # polars releases the GIL while collecting, so the sets aggregate in parallel
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(codes)))
+        ) as executor:
+            results = list(executor.map(summon_set, codes))
 
-    full_agg_df = pl.concat(concat_dfs, how="vertical")
+    concat_dfs = [agg_df for agg_df, _ in results]
+    # we use the last set's manifest, it shouldn't matter which
+    m = results[-1][1]
 
-    assert (
-        m is not None
-    ), "What happened? We mean to use one of the sets manifest, it shouldn't matter which."
+    full_agg_df = pl.concat(concat_dfs, how="vertical")
 
     if m.group_by:
         gb = m.group_by
@@ -572,15 +1580,15 @@ def view_select(
 
     col_def_map = _hydrate_col_defs(set_code, specs, card_context, set_context)
 
-    df_path = cache.data_file_path(set_code, view)
-    base_view_df = pl.scan_parquet(df_path)
-
     select_cols = frozenset(columns)
 
     filter_ = spells.filter.from_spec(filter_spec)
     if filter_ is not None:
         select_cols = select_cols.union(filter_.lhs)
 
+    date_range = _draft_date_range(filter_, _get_set_context(set_code, set_context))
+    base_view_df = _scan_view(set_code, view, date_range)
+
     base_df_prefilter = _view_select(
         base_view_df,
         select_cols,
@@ -36,6 +36,7 @@ class ColName(StrEnum):
     EXPANSION = "expansion"
     EVENT_TYPE = "event_type"
     DRAFT_ID = "draft_id"
+    DRAFT_KEY = "draft_key"  # added at ingest, dense integer id shared by views
     DRAFT_TIME = "draft_time"  # modified, cast to time
     DRAFT_DATE = "draft_date"
     FORMAT_DAY = "format_day"
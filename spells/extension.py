@@ -5,6 +5,7 @@ import polars as pl
 from spells.enums import ColType, ColName
 from spells.columns import ColSpec
 from spells.cache import spells_print
+from spells import kernel
 
 
 def print_ext(ext: dict[str, ColSpec]) -> None:
@@ -52,27 +53,31 @@ def context_cols(attr, silent: bool = False) -> dict[str, ColSpec]:
         ),
         f"greatest_{attr}_seen": ColSpec(
             col_type=ColType.PICK_SUM,
-            expr=lambda names: pl.max_horizontal(
-                [pl.col(f"seen_{attr}_{name}") for name in names]
+            expr=lambda names, card_context: kernel.weighted_max(
+                ColName.PACK_CARD, kernel.card_weights(names, card_context, attr)
             ),
         ),
         f"least_{attr}_seen": ColSpec(
             col_type=ColType.PICK_SUM,
-            expr=lambda names: pl.min_horizontal(
-                [pl.col(f"seen_{attr}_{name}") for name in names]
+            expr=lambda names, card_context: kernel.weighted_min(
+                ColName.PACK_CARD, kernel.card_weights(names, card_context, attr)
             ),
         ),
         f"pick_{attr}_rank_greatest": ColSpec(
             col_type=ColType.GROUP_BY,
-            expr=lambda names: pl.sum_horizontal(
-                [pl.col(f"seen_{attr}_greater_{name}") for name in names]
+            expr=lambda names, card_context: kernel.count_greater(
+                ColName.PACK_CARD,
+                kernel.card_weights(names, card_context, attr),
+                pl.col(f"pick_{attr}_sum"),
             )
             + 1,
         ),
         f"pick_{attr}_rank_least": ColSpec(
             col_type=ColType.GROUP_BY,
-            expr=lambda names: pl.sum_horizontal(
-                [pl.col(f"seen_{attr}_less_{name}") for name in names]
+            expr=lambda names, card_context: kernel.count_less(
+                ColName.PACK_CARD,
+                kernel.card_weights(names, card_context, attr),
+                pl.col(f"pick_{attr}_sum"),
             )
             + 1,
         ),
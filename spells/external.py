@@ -5,29 +5,65 @@ file containing card attributes using MTGJSON
 cli tool `spells`
 """
 
+import datetime
 import functools
 import gzip
+import io
+import multiprocessing
 import os
 import re
 import shutil
 import sys
+import tempfile
+import time
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
 from enum import StrEnum
 
-import wget
 import polars as pl
 from polars.exceptions import ComputeError
 
 from spells import cards
+from spells import config
+from spells import download
+from spells import draft_data
 from spells import cache
 from spells.enums import View, ColName
-from spells.schema import schema
-from spells.draft_data import summon
+from spells.schema import TIMESTAMP_FORMATS, parse_timestamps, schema
 
 
 DATASET_TEMPLATE = "{dataset_type}_data_public.{set_code}.{event_type}.csv.gz"
 RESOURCE_TEMPLATE = (
     "https://17lands-public.s3.amazonaws.com/analysis_data/{dataset_type}_data/"
 )
+MAX_DOWNLOADS = 4  # sets downloaded concurrently by `spells add SET1 SET2 ...`
+CSV_CHUNK_SIZE = 64 * 1024 * 1024  # uncompressed bytes of csv parsed at a time
+MAX_REPORTED_ROWS = 5
+MAX_REPORTED_CACHE_FILES = 5  # largest cache files of each set listed by `spells info`
+
+# columns identifying a row across data drops, used to find the new rows of a newer dump
+INCREMENT_KEYS = {
+    View.DRAFT: (ColName.DRAFT_ID, ColName.PACK_NUMBER, ColName.PICK_NUMBER),
+    View.GAME: (
+        ColName.DRAFT_ID,
+        ColName.BUILD_INDEX,
+        ColName.MATCH_NUMBER,
+        ColName.GAME_NUMBER,
+    ),
+}
+
+# drafts started on a day needed for it to count toward the set's release date
+MIN_RELEASE_DRAFTS = 1000
+
+# row order of the converted files, so the rows of each draft are contiguous
+SORT_KEYS = {
+    View.DRAFT: (ColName.DRAFT_KEY, ColName.PACK_NUMBER, ColName.PICK_NUMBER),
+    View.GAME: (ColName.DRAFT_KEY, ColName.MATCH_NUMBER, ColName.GAME_NUMBER),
+}
 
 
 class FileFormat(StrEnum):
@@ -48,7 +84,11 @@ def cli() -> int:
     data_dir = cache.data_home()
     cache.spells_print("spells", f"[data home]={data_dir}")
     print()
-    usage = """spells [add|refresh|remove|clean] [set_code]
+    usage = """spells [add|refresh|update|reconvert|cube|remove|clean] [set_code]
+            spells [add|refresh] [set_code] --partition=[day|week] --sparse --categorical
+            spells cube [set_code] --group_by=[col],[col],...
+            spells [add|refresh] [set_code] [set_code] ... --workers=[n]
+            spells [add|refresh] all --workers=[n]
             spells clean all
             spells info
 
@@ -59,54 +99,420 @@ def cli() -> int:
 
         e.g. $ spells add OTJ
 
+        Several set codes, or `all` for every set in `spells.config.all_sets`, are downloaded a few
+        at a time while up to --workers sets (default: a quarter of your cores) are converted in
+        parallel processes.
+
+        --partition: Write the draft and game files as directories of parquet files partitioned
+        by draft date or week, so that queries filtered by date only read the matching partitions.
+
+        --sparse: Also write the nonzero card counts (pack_card, pool, deck, drawn, etc.) in long
+        format, which `summon` uses to sum those columns by name without scanning every card column.
+
+        --categorical: Read low-cardinality string columns (rank, pick, main_colors, etc.) as
+        categoricals, which makes grouping and filtering on them faster and lighter.
+
     refresh: Force download and overwrite of existing files (for new data drops, use sparingly!). Clear 
         local 
 
+    update: Download the latest draft and game files and append only the rows not already in the
+        existing files, keeping their partitioning and sparse tables. The draft dates of the new rows
+        are logged to [set code]_PremierDraft_updates.parquet, and only the local cache files
+        covering those dates are cleared.
+
+    reconvert: Rewrite the existing draft and game files (and sparse tables) with the current parquet
+        options, such as compression and row group size, from $SPELLS_PARQUET_* environment variables
+        or the [parquet] table of [data home]/spells.toml (or $SPELLS_CONFIG). These options also apply
+        to files written by add, refresh and update and to the local cache.
+
+    cube: Write the base cube of each of the draft and game files, the sums of every built-in base
+        column grouped by --group_by (default: $SPELLS_CUBE_GROUP_BY, the `group_by` of the [cube] table
+        of the config file, or name, draft_date, rank, player_cohort and main_colors). `summon` rolls up
+        any coarser group by, filtered on those columns, from the cube instead of scanning the files.
+        Once written, or with a grain configured, the cubes are rebuilt by add, refresh, update and
+        reconvert.
+
     remove: Delete the [data home]/external/[set code] and [data home]/local/[set code] directories and their contents
 
     clean: Delete [data home]/local/[set code] data directory (your cache of aggregate parquet files), or all of them.
 
-    info: No set code argument. Print info on all external and local files.
+    info: No set code argument. Print info on all external and local files, with row counts and
+        draft dates from each set's catalog, and the hit rate and largest files of each set's cache.
     """
     print_usage = functools.partial(cache.spells_print, "usage", usage)
 
-    if len(sys.argv) < 2:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = dict(
+        arg[2:].partition("=")[::2] for arg in sys.argv[1:] if arg.startswith("--")
+    )
+
+    if len(args) < 1:
         print_usage()
         return 1
 
-    mode = sys.argv[1]
+    mode = args[0]
 
     if mode == "info":
         return _info()
 
-    if len(sys.argv) != 3:
+    if len(args) < 2 or (len(args) > 2 and mode not in ("add", "refresh")):
+        print_usage()
+        return 1
+
+    set_codes = args[1:]
+    if mode in ("add", "refresh") and set_codes == ["all"]:
+        set_codes = list(config.all_sets)
+
+    try:
+        partition_by = (
+            cache.PartitionBy(options.pop("partition"))
+            if "partition" in options
+            else None
+        )
+    except ValueError:
+        print_usage()
+        return 1
+
+    sparse = options.pop("sparse", None) is not None
+    categorical = options.pop("categorical", None) is not None
+    group_by = options.pop("group_by").split(",") if "group_by" in options else None
+
+    try:
+        workers = int(options.pop("workers")) if "workers" in options else None
+    except ValueError:
+        print_usage()
+        return 1
+
+    if (
+        options
+        or (
+            (partition_by is not None or sparse or categorical or workers is not None)
+            and mode not in ("add", "refresh")
+        )
+        or (group_by is not None and mode != "cube")
+    ):
         print_usage()
         return 1
 
     match mode:
+        case "add" | "refresh" if len(set_codes) > 1:
+            return _add_sets(
+                set_codes,
+                force_download=mode == "refresh",
+                partition_by=partition_by,
+                sparse=sparse,
+                categorical=categorical,
+                workers=workers,
+            )
         case "add":
-            return _add(sys.argv[2])
+            return _add(
+                args[1],
+                partition_by=partition_by,
+                sparse=sparse,
+                categorical=categorical,
+            )
         case "refresh":
-            return _refresh(sys.argv[2])
+            return _refresh(
+                args[1],
+                partition_by=partition_by,
+                sparse=sparse,
+                categorical=categorical,
+            )
+        case "update":
+            return _update(args[1])
+        case "reconvert":
+            return _reconvert(args[1])
+        case "cube":
+            return draft_data.write_cube(args[1], group_by)
         case "remove":
-            return _remove(sys.argv[2])
+            return _remove(args[1])
         case "clean":
-            return cache.clean(sys.argv[2])
+            return cache.clean(args[1])
         case _:
             print_usage()
             return 1
 
 
-def _add(set_code: str, force_download=False):
-    download_data_set(set_code, View.DRAFT, force_download=force_download)
-    write_card_file(set_code, force_download=force_download)
-    get_set_context(set_code)
-    download_data_set(set_code, View.GAME, force_download=force_download)
+def _add(
+    set_code: str,
+    force_download=False,
+    partition_by: cache.PartitionBy | None = None,
+    sparse: bool = False,
+    categorical: bool = False,
+    downloaded: bool = False,
+):
+    """
+    Run the ingest stages for a set as a pipeline, so that the game file download
+    overlaps the draft file conversion and the MTGJSON fetch overlaps both. Each
+    stage waits only on the stages it depends on:
+
+        draft download -> draft conversion -> card file -> set context
+        game download, draft conversion -> game conversion
+        MTGJSON fetch -> card file
+
+    The game conversion waits on the draft conversion to reuse its draft keys.
+    """
+    convert = functools.partial(
+        download_data_set,
+        set_code,
+        force_download=force_download,
+        partition_by=partition_by,
+        sparse=sparse,
+        clear_set_cache=False,
+        downloaded=True,
+    )
+
+    def download_stage(view: View):
+        mode = "refresh" if force_download else "add"
+        if downloaded or (
+            os.path.exists(cache.data_file_path(set_code, view)) and not force_download
+        ):
+            return
+        cache.spells_print(mode, f"Downloading {view} dataset from 17Lands.com")
+        _download_dataset(set_code, view, cache.EventType.PREMIER)
+
+    def convert_stage(view: View, *upstream: Future) -> int:
+        for future in upstream:
+            future.result()
+        return convert(view)
+
+    def card_stage(draft_future: Future, card_data: Future | None):
+        draft_future.result()
+        write_card_file(set_code, force_download=force_download, card_data=card_data)
+        get_set_context(set_code, force_download=force_download)
+
+    card_filepath = cache.data_file_path(set_code, View.CARD)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        card_data = (
+            pool.submit(cards.fetch_card_data, set_code)
+            if force_download or not os.path.isfile(card_filepath)
+            else None
+        )
+        draft_download = pool.submit(download_stage, View.DRAFT)
+        game_download = pool.submit(download_stage, View.GAME)
+        draft = pool.submit(convert_stage, View.DRAFT, draft_download)
+        game = pool.submit(convert_stage, View.GAME, game_download, draft)
+        card = pool.submit(card_stage, draft, card_data)
+        card.result()
+        converted = [draft.result() == 0, game.result() == 0]
+
+    # cleared once both conversions are done rather than by each, which would race
+    # with the set context calculation
+    if any(converted):
+        cache.clean(set_code)
+
+    # a set keeps its encoding unless converted again
+    if write_catalog(set_code, categorical=categorical if any(converted) else None):
+        return 1
+    _write_cubes(set_code)
     return 0
 
 
-def _refresh(set_code: str):
-    return _add(set_code, force_download=True)
+def _download_set(set_code: str, force_download=False) -> str:
+    for view in (View.DRAFT, View.GAME):
+        if force_download or not os.path.exists(cache.data_file_path(set_code, view)):
+            _download_dataset(set_code, view, cache.EventType.PREMIER)
+    return set_code
+
+
+def _add_sets(
+    set_codes: list[str],
+    force_download=False,
+    partition_by: cache.PartitionBy | None = None,
+    sparse: bool = False,
+    categorical: bool = False,
+    workers: int | None = None,
+) -> int:
+    """
+    Add several sets at once. Downloads run a few at a time in threads, and each set
+    is handed to a pool of `workers` processes for conversion as soon as both of its
+    files have arrived, with polars threads divided evenly between the workers.
+    """
+    mode = "refresh" if force_download else "add"
+    cpu_count = os.cpu_count() or 1
+    workers = max(1, workers or cpu_count // 4)
+    cache.spells_print(
+        mode, f"Adding {len(set_codes)} sets with {workers} conversion workers"
+    )
+
+    failed = []
+    polars_threads = os.environ.get("POLARS_MAX_THREADS")
+    # inherited by the worker processes, which start with a fresh interpreter
+    os.environ["POLARS_MAX_THREADS"] = str(max(1, cpu_count // workers))
+    try:
+        with (
+            ThreadPoolExecutor(max_workers=MAX_DOWNLOADS) as download_pool,
+            ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            ) as convert_pool,
+        ):
+            download_futures = [
+                download_pool.submit(_download_set, set_code, force_download)
+                for set_code in set_codes
+            ]
+            convert_futures = {}
+            for future in as_completed(download_futures):
+                try:
+                    set_code = future.result()
+                except Exception as e:
+                    cache.spells_print("error", f"Download failed: {e}")
+                    continue
+                cache.spells_print(mode, f"{set_code}: downloaded, converting")
+                convert_futures[
+                    convert_pool.submit(
+                        _add,
+                        set_code,
+                        force_download=force_download,
+                        partition_by=partition_by,
+                        sparse=sparse,
+                        categorical=categorical,
+                        downloaded=True,
+                    )
+                ] = set_code
+
+            for num_done, future in enumerate(as_completed(convert_futures), 1):
+                set_code = convert_futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    cache.spells_print("error", f"{set_code}: failed with {e}")
+                    failed.append(set_code)
+                    continue
+                if result:
+                    failed.append(set_code)
+                    continue
+                cache.spells_print(
+                    mode, f"{set_code}: done ({num_done}/{len(convert_futures)})"
+                )
+    finally:
+        if polars_threads is None:
+            del os.environ["POLARS_MAX_THREADS"]
+        else:
+            os.environ["POLARS_MAX_THREADS"] = polars_threads
+
+    failed.extend(set(set_codes) - set(convert_futures.values()))
+    if failed:
+        cache.spells_print("error", f"Failed to add {', '.join(sorted(failed))}")
+        return 1
+    return 0
+
+
+def _refresh(
+    set_code: str,
+    partition_by: cache.PartitionBy | None = None,
+    sparse: bool = False,
+    categorical: bool = False,
+):
+    return _add(
+        set_code,
+        force_download=True,
+        partition_by=partition_by,
+        sparse=sparse,
+        categorical=categorical,
+    )
+
+
+def _update(set_code: str):
+    mode = "update"
+    date_ranges = []
+    for view in (View.DRAFT, View.GAME):
+        if not os.path.exists(cache.data_file_path(set_code, view)):
+            cache.spells_print(
+                mode, f"No {view} file for set {set_code}, use `spells add {set_code}`"
+            )
+            return 1
+        date_ranges.append(update_data_set(set_code, view))
+
+    date_ranges = [date_range for date_range in date_ranges if date_range is not None]
+    if date_ranges:
+        start = min(start for start, _ in date_ranges)
+        end = max(end for _, end in date_ranges)
+        context_fp = cache.data_file_path(set_code, "context")
+        context_df = pl.read_parquet(context_fp) if os.path.isfile(context_fp) else None
+        get_set_context(set_code, date_range=(start, end))
+        if context_df is not None and context_df.equals(pl.read_parquet(context_fp)):
+            cache.invalidate(set_code, start, end)
+        else:
+            # format days of every cached aggregate may have shifted
+            cache.clean(set_code)
+    else:
+        cache.spells_print(mode, f"No new rows found for set {set_code}")
+
+    if write_catalog(set_code):
+        return 1
+    _write_cubes(set_code)
+    return 0
+
+
+def _reconvert(set_code: str):
+    mode = "reconvert"
+    options = cache.parquet_options(cache.DataDir.EXTERNAL)
+    cache.spells_print(
+        mode,
+        f"Rewriting files for set {set_code} with options {options or 'polars defaults'}",
+    )
+    for dataset_type in (View.DRAFT, View.GAME, "draft_sparse", "game_sparse"):
+        target_path = cache.data_file_path(set_code, dataset_type)
+        if not os.path.exists(target_path):
+            if dataset_type in (View.DRAFT, View.GAME):
+                cache.spells_print(
+                    mode,
+                    f"No {dataset_type} file for set {set_code}, use `spells add {set_code}`",
+                )
+                return 1
+            continue
+
+        size = _path_size(target_path)
+        start = time.perf_counter()
+        _rewrite_files(cache.data_file_paths(set_code, dataset_type), options)
+        cache.spells_print(
+            mode,
+            f"Rewrote {target_path} ({sizeof_fmt(size)} -> "
+            + f"{sizeof_fmt(_path_size(target_path))}) in {time.perf_counter() - start:.1f}s",
+        )
+
+    if write_catalog(set_code):
+        return 1
+    _write_cubes(set_code)
+    return 0
+
+
+def _rewrite_files(paths: list[str], options: dict) -> None:
+    """
+    Rewrite parquet files in place with the write `options`. Categorical columns,
+    written by earlier versions of `spells add --categorical`, are rewritten as strings,
+    since polars 1.14 can't read them under a predicate when they have nulls.
+    """
+    for path in paths:
+        rewritten_path = path + ".tmp"
+        _sink_parquet(
+            pl.scan_parquet(path, hive_partitioning=False).with_columns(
+                pl.col(pl.Categorical).cast(pl.String)
+            ),
+            rewritten_path,
+            options,
+        )
+        os.replace(rewritten_path, path)
+
+
+def _write_cubes(set_code: str) -> None:
+    """
+    Rebuild the set's base cubes if they are out of date, at the grain they were written
+    with, or at the configured grain if there are none
+    """
+    metas = {
+        view: cache.read_cube_meta(set_code, view) for view in (View.DRAFT, View.GAME)
+    }
+    if all(
+        meta is not None and meta["fingerprint"] == cache.fingerprint(set_code, view)
+        for view, meta in metas.items()
+    ):
+        return
+    recorded = [meta["group_by"] for meta in metas.values() if meta is not None]
+    group_by = list(dict.fromkeys(col for cols in recorded for col in cols))
+    group_by = group_by or cache.cube_group_by()
+    if group_by:
+        draft_data.write_cube(set_code, group_by)
 
 
 def _remove(set_code: str):
@@ -116,14 +522,16 @@ def _remove(set_code: str):
         with os.scandir(dir_path) as set_dir:
             count = 0
             for entry in set_dir:
-                if not entry.name.endswith(".parquet"):
+                if not entry.name.endswith(
+                    (".parquet", ".part", ".part.json", "_cube.json", cache.CATALOG)
+                ):
                     cache.spells_print(
                         mode,
                         f"Unexpected file {entry.name} found in external cache, please sort that out!",
                     )
                     return 1
                 count += 1
-                os.remove(entry)
+                _remove_path(entry.path)
             cache.spells_print(
                 mode, f"Removed {count} files from external cache for set {set_code}"
             )
@@ -149,13 +557,33 @@ def _info():
                     all_external.add(entry.name)
                     file_count = 0
                     cache.spells_print(mode, f"Archive {entry.name} contents:")
+                    descriptions = _catalog_descriptions(entry.name)
                     for item in os.scandir(entry):
-                        if not re.match(f"^{entry.name}_.*\\.parquet", item.name):
+                        if (
+                            not re.match(f"^{entry.name}_.*\\.parquet", item.name)
+                            and not re.match(f"^{entry.name}_.*_cube\\.json", item.name)
+                            and item.name != f"{entry.name}_{cache.CATALOG}"
+                        ):
                             print(
                                 f"!!! imposter file {item.name}! Please sort that out"
                             )
-                        print(f"    {item.name} {sizeof_fmt(os.stat(item).st_size)}")
-                        file_count += 1
+                        print(
+                            f"    {item.name} "
+                            + descriptions.get(
+                                item.name, sizeof_fmt(_path_size(item.path))
+                            )
+                        )
+                        if not item.name.endswith(
+                            (
+                                "_sparse.parquet",
+                                "_updates.parquet",
+                                "_draft_days.parquet",
+                                "_cube.parquet",
+                                "_cube.json",
+                                cache.CATALOG,
+                            )
+                        ):
+                            file_count += 1
                     if file_count < 4:
                         suggest_add.add(entry.name)
                     if file_count > 4:
@@ -173,23 +601,36 @@ def _info():
     if os.path.isdir(cache_path):
         print()
         cache.spells_print(mode, f"Local cache found {cache_path}")
+        budget = cache.cache_budget()
+        if budget:
+            cache.spells_print(
+                mode,
+                "Budget: "
+                + ", ".join(
+                    f"max size {sizeof_fmt(value)}"
+                    if key == "max_size"
+                    else f"max age {value:g} days"
+                    for key, value in budget.items()
+                ),
+            )
         with os.scandir(cache_path) as cache_dir:
             for entry in cache_dir:
                 if entry.name not in all_external:
                     suggest_remove.add(entry.name)
                 if entry.is_dir():
                     cache.spells_print(mode, f"Cache {entry.name} contents:")
-                    parquet_num = 0
-                    parquet_size = 0
+                    sizes = {}
                     for item in os.scandir(entry):
                         if item.name.endswith(".parquet"):
-                            parquet_num += 1
-                            parquet_size += os.stat(item).st_size
-                        else:
+                            sizes[item.name[: -len(".parquet")]] = os.stat(item).st_size
+                        elif item.name != cache.CACHE_INDEX:
                             print(
                                 f"!!! imposter file {item.name}! Please sort that out"
                             )
-                    print(f"    {parquet_num} cache files: {sizeof_fmt(parquet_size)}")
+                    print(
+                        f"    {len(sizes)} cache files: {sizeof_fmt(sum(sizes.values()))}"
+                    )
+                    _print_cache_usage(entry.name, sizes)
     else:
         print()
         cache.spells_print(mode, "No local cache found")
@@ -203,30 +644,632 @@ def _info():
     return 0
 
 
-def _process_zipped_file(gzip_path, target_path):
-    csv_path = gzip_path[:-3]
-    # if polars supports streaming from file obj, we can just stream straight
-    # from urllib.Request through GzipFile to sink_parquet without intermediate files
+def _print_cache_usage(set_code: str, sizes: dict[str, int]):
+    """
+    Hit rate of the set's cache files and the largest of them, from its cache index.
+    Each file was written on a miss, so the lookups it served are its hits plus one.
+    """
+    index = cache.read_cache_index(set_code)
+    entries = {key: index.get(key, {}) for key in sizes}
+    hits = sum(entry.get("hits", 0) for entry in entries.values())
+    if entries:
+        lookups = hits + len(entries)
+        print(f"    {hits} hits in {lookups} lookups ({hits / lookups:.0%})")
+
+    largest = sorted(sizes, key=sizes.get, reverse=True)[:MAX_REPORTED_CACHE_FILES]
+    for key in largest:
+        entry = entries[key]
+        description = f"      {key} {sizeof_fmt(sizes[key])}"
+        if "group_by" in entry:
+            description += f", by {', '.join(entry['group_by']) or 'nothing'}"
+        if "last_access" in entry:
+            description += f", {entry['hits']} hits, last read {entry['last_access']:%Y-%m-%d %H:%M}"
+        print(description)
+
+
+def _catalog_descriptions(set_code: str) -> dict[str, str]:
+    """
+    Size, row count and draft dates of the files described by the set's catalog, if it
+    is up to date, by file name
+    """
+    catalog = cache.read_catalog(set_code)
+    if catalog is None:
+        return {}
+    catalog = cache.read_catalog(set_code, tuple(catalog["files"]))
+    if catalog is None:
+        return {}
+
+    descriptions = {}
+    for dataset_type, entry in catalog["files"].items():
+        size = sum(file_size for _, file_size, _ in entry["fingerprint"])
+        description = f"{sizeof_fmt(size)}, {entry['num_rows']:,} rows"
+        start, end = entry["time_range"].get(ColName.DRAFT_TIME, (None, None))
+        if start is not None:
+            description += f", drafts {start:%Y-%m-%d} to {end:%Y-%m-%d}"
+        file_name = os.path.basename(cache.data_file_path(set_code, dataset_type))
+        descriptions[file_name] = description
+    return descriptions
+
+
+def _csv_chunks(gzip_path: str, chunk_size: int = CSV_CHUNK_SIZE):
+    """
+    Decompress the csv incrementally, yielding the header line and a block of
+    complete records of roughly `chunk_size` uncompressed bytes at a time. A quoted
+    field may span lines, so a block is only cut where the quotes seen so far balance.
+    """
     with gzip.open(gzip_path, "rb") as f_in:
-        with open(csv_path, "wb") as f_out:
-            shutil.copyfileobj(f_in, f_out)  # type: ignore
+        header = f_in.readline()
+        block, quotes = [], 0
+        while lines := f_in.readlines(chunk_size):
+            block.extend(lines)
+            # escaped quotes come in pairs, so an odd count is inside a quoted field
+            quotes += sum(line.count(b'"') for line in lines)
+            if quotes % 2 == 0:
+                yield header, b"".join(block)
+                block = []
+        if block:
+            yield header, b"".join(block)
+
+
+def _cast_expr(name: str, dtype) -> pl.Expr:
+    if dtype == pl.Boolean:
+        return (
+            pl.col(name)
+            .str.to_lowercase()
+            .replace_strict({"true": True, "false": False}, default=None)
+        )
+    return pl.col(name).cast(dtype, strict=False)
 
-    os.remove(gzip_path)
-    df = pl.scan_csv(csv_path, schema=schema(csv_path))
+
+def _cast_chunk(df: pl.DataFrame, dtypes, row_offset: int) -> pl.DataFrame:
+    """
+    Cast a chunk read as strings to the target schema, nulling and reporting values
+    that can't be cast instead of failing the whole chunk.
+    """
+    cast_df = df.select(_cast_expr(name, dtype) for name, dtype in dtypes.items())
+    _report_nulled(df, cast_df, list(dtypes), row_offset)
+    return cast_df
+
+
+def _report_nulled(
+    df: pl.DataFrame, cast_df: pl.DataFrame, names: list[str], row_offset: int
+):
+    """
+    Report the values of the columns `names` that are null in `cast_df` but weren't in
+    `df`, with the first few row numbers
+    """
+    if not names:
+        return
+    failed = cast_df.select(
+        (pl.col(name).is_null() & df.get_column(name).is_not_null()).alias(name)
+        for name in names
+    )
+    for name, count in failed.sum().row(0, named=True).items():
+        if count:
+            rows = (
+                failed.with_row_index("row", offset=row_offset)
+                .filter(pl.col(name))
+                .get_column("row")
+                .head(MAX_REPORTED_ROWS)
+                .to_list()
+            )
+            sample = ", ".join(map(str, rows)) + (", ..." if count > len(rows) else "")
+            cache.spells_print(
+                "error",
+                f"Could not cast {count} values of column {name} to "
+                + f"{cast_df.schema[name]}, writing nulls (rows {sample})",
+            )
+
+
+def _read_csv_chunk(
+    header: bytes, body: bytes, dtypes, row_offset: int = 0
+) -> pl.DataFrame:
     try:
-        df.sink_parquet(target_path)
+        df = pl.read_csv(io.BytesIO(header + body), schema=dtypes)
     except ComputeError:
-        df = pl.scan_csv(csv_path)
         cache.spells_print(
             "error",
-            "Bad schema found, loading dataset into memory"
-            + " and attempting to cast to correct schema",
+            f"Bad schema found in chunk starting at row {row_offset},"
+            + " attempting to cast to correct schema",
+        )
+        df = pl.read_csv(io.BytesIO(header + body), infer_schema=False)
+        df = _cast_chunk(df, dtypes, row_offset)
+
+    parsed_df = df.with_columns(parse_timestamps(df.schema))
+    timestamps = [
+        name
+        for name in TIMESTAMP_FORMATS
+        if df.schema.get(name) == pl.String and parsed_df.schema[name] != pl.String
+    ]
+    _report_nulled(df, parsed_df, timestamps, row_offset)
+    return parsed_df
+
+
+def _path_size(path: str) -> int:
+    if not os.path.isdir(path):
+        return os.stat(path).st_size
+    return sum(
+        os.stat(os.path.join(dir_path, file_name)).st_size
+        for dir_path, _, file_names in os.walk(path)
+        for file_name in file_names
+    )
+
+
+def _remove_path(path: str):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _draft_date_expr() -> pl.Expr:
+    return pl.col(ColName.DRAFT_TIME).dt.date()
+
+
+def _partition_expr(partition_by: cache.PartitionBy) -> pl.Expr:
+    draft_date = _draft_date_expr()
+    if partition_by == cache.PartitionBy.WEEK:
+        draft_date = draft_date.dt.truncate("1w")
+    return draft_date.alias(cache.PARTITION_KEYS[partition_by])
+
+
+def _sink_parquet(lf: pl.LazyFrame, path: str, options: dict) -> None:
+    """
+    Stream `lf` to a parquet file with the write `options`. polars 1.14 cuts the row
+    groups of a sink at its streaming chunks and ignores `row_group_size`, so the
+    chunks are sized to it instead, which gives row groups of about that size.
+    """
+    with pl.Config(streaming_chunk_size=options.get("row_group_size")):
+        lf.sink_parquet(path, **options)
+
+
+def _write_part(
+    df: pl.DataFrame,
+    parts_dir: str,
+    part_name: str,
+    partition_by: cache.PartitionBy | None = None,
+    options: dict | None = None,
+):
+    part_name = f"{part_name}.parquet"
+    options = options or {}
+    if partition_by is None:
+        df.write_parquet(os.path.join(parts_dir, part_name), **options)
+        return
+
+    key = cache.PARTITION_KEYS[partition_by]
+    partitions = df.with_columns(_partition_expr(partition_by)).partition_by(
+        key, as_dict=True
+    )
+    for (value,), partition_df in partitions.items():
+        partition_dir = os.path.join(parts_dir, f"{key}={value}")
+        os.makedirs(partition_dir, exist_ok=True)
+        partition_df.drop(key).write_parquet(
+            os.path.join(partition_dir, part_name), **options
         )
-        select = [pl.col(name).cast(dtype) for name, dtype in schema(csv_path).items()]
-        cast_df = df.select(select).collect()
-        cast_df.write_parquet(target_path)
 
-    os.remove(csv_path)
+
+def _sparse_chunk(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    The nonzero entries of the name-mapped card columns of a chunk in long format,
+    with columns (row_id, prefix, name, count)
+    """
+    columns = {}
+    for prefix in cache.SPARSE_PREFIXES:
+        for col in df.columns:
+            if col.startswith(f"{prefix}_"):
+                columns[col] = (prefix, col[len(prefix) + 1 :])
+    prefix_enum = pl.Enum(cache.SPARSE_PREFIXES)
+    name_enum = pl.Enum(list(dict.fromkeys(name for _, name in columns.values())))
+    if not columns:
+        return pl.DataFrame(
+            schema={
+                cache.ROW_ID: pl.UInt32,
+                "prefix": prefix_enum,
+                ColName.NAME: name_enum,
+                "count": pl.Int8,
+            }
+        )
+
+    frames = [
+        df.lazy()
+        .select(
+            pl.col(cache.ROW_ID),
+            pl.lit(prefix, dtype=prefix_enum).alias("prefix"),
+            pl.lit(name, dtype=name_enum).alias(ColName.NAME),
+            pl.col(col).alias("count"),
+        )
+        .filter(pl.col("count") != 0)
+        for col, (prefix, name) in columns.items()
+    ]
+    return pl.concat(frames).collect()
+
+
+def _known_draft_keys(paths: list[str]) -> pl.DataFrame | None:
+    """
+    The draft keys assigned in the existing files `paths`, if they have any
+    """
+    paths = [path for path in paths if os.path.exists(path)]
+    if not paths:
+        return None
+    lf = pl.scan_parquet(paths, hive_partitioning=False)
+    if ColName.DRAFT_KEY not in lf.collect_schema():
+        return None
+    return lf.select(ColName.DRAFT_ID, ColName.DRAFT_KEY).unique().collect()
+
+
+def _draft_keys(lf: pl.LazyFrame, known: pl.DataFrame | None = None) -> pl.DataFrame:
+    """
+    Number the drafts of `lf` densely in order of draft time, reusing the `known` keys
+    and numbering any other drafts after them.
+    """
+    names = lf.collect_schema().names()
+    if ColName.DRAFT_TIME in names:
+        drafts = lf.group_by(ColName.DRAFT_ID).agg(pl.col(ColName.DRAFT_TIME).min())
+        order = [ColName.DRAFT_TIME, ColName.DRAFT_ID]
+    else:
+        drafts = lf.select(ColName.DRAFT_ID).unique()
+        order = [ColName.DRAFT_ID]
+
+    offset = 0
+    if known is not None:
+        known = known.unique(ColName.DRAFT_ID, keep="first", maintain_order=True)
+        drafts = drafts.join(
+            known.lazy(), on=ColName.DRAFT_ID, how="anti", join_nulls=True
+        )
+        if not known.is_empty():
+            offset = known[ColName.DRAFT_KEY].max() + 1
+
+    new_keys = (
+        drafts.sort(order, nulls_last=True)
+        .collect()
+        .with_row_index(ColName.DRAFT_KEY, offset=offset)
+        .select(ColName.DRAFT_ID, ColName.DRAFT_KEY)
+    )
+    return new_keys if known is None else pl.concat([known, new_keys])
+
+
+def _with_draft_keys(
+    lf: pl.LazyFrame, draft_keys: pl.DataFrame | None, sort_by: tuple[str, ...]
+) -> pl.LazyFrame:
+    """
+    Add the draft key as the first column, if given, and sort by the `sort_by`
+    columns present
+    """
+    if draft_keys is not None:
+        lf = lf.join(
+            draft_keys.lazy(), on=ColName.DRAFT_ID, how="left", join_nulls=True
+        ).select(ColName.DRAFT_KEY, pl.exclude(ColName.DRAFT_KEY))
+    names = lf.collect_schema().names()
+    sort_by = tuple(col for col in sort_by if col in names)
+    return lf.sort(sort_by, nulls_last=True) if sort_by else lf
+
+
+def _merge_parts(
+    parts_dir: str,
+    target_path: str,
+    partitioned: bool = False,
+    sort_by: tuple[str, ...] = (),
+    known_draft_keys: pl.DataFrame | None = None,
+):
+    """
+    Merge the parquet parts written for each chunk into one file, or one file per
+    partition directory, then swap the result in for any existing target.
+
+    If `sort_by` includes the draft key, the drafts are numbered across all parts,
+    continuing `known_draft_keys`, and the key is added to each row. The merged rows
+    are sorted by `sort_by`.
+    """
+    merged_path = os.path.join(parts_dir, os.path.basename(target_path))
+    options = cache.parquet_options(cache.DataDir.EXTERNAL)
+    part_glob = os.path.join(parts_dir, "*" if partitioned else "", "part-*.parquet")
+
+    draft_keys = None
+    if ColName.DRAFT_KEY in sort_by:
+        parts = pl.scan_parquet(part_glob, hive_partitioning=False)
+        if ColName.DRAFT_ID in parts.collect_schema():
+            draft_keys = _draft_keys(parts, known_draft_keys)
+
+    if partitioned:
+        with os.scandir(parts_dir) as part_dir:
+            partitions = sorted(entry.name for entry in part_dir if entry.is_dir())
+        for partition in partitions:
+            os.makedirs(os.path.join(merged_path, partition))
+            _sink_parquet(
+                _with_draft_keys(
+                    pl.scan_parquet(
+                        os.path.join(parts_dir, partition, "*.parquet"),
+                        hive_partitioning=False,
+                    ),
+                    draft_keys,
+                    sort_by,
+                ),
+                os.path.join(merged_path, partition, "0.parquet"),
+                options,
+            )
+    else:
+        _sink_parquet(
+            _with_draft_keys(pl.scan_parquet(part_glob), draft_keys, sort_by),
+            merged_path,
+            options,
+        )
+
+    _remove_path(target_path)
+    os.replace(merged_path, target_path)
+
+
+def _process_zipped_file(
+    gzip_path,
+    target_path,
+    partition_by: cache.PartitionBy | None = None,
+    sparse_path: str | None = None,
+    sort_by: tuple[str, ...] = (),
+    known_draft_keys: pl.DataFrame | None = None,
+):
+    """
+    Stream the gzipped csv through polars in chunks, writing one parquet part per
+    chunk, then merge the parts into the target file. No uncompressed csv is ever
+    written to disk.
+
+    If `partition_by` is given, the target is instead a directory of hive-style
+    partitions by draft date or week, e.g. `draft_date=2024-09-24/0.parquet`.
+
+    If `sparse_path` is given, a `row_id` column is added to the target and the
+    nonzero card counts are also written to `sparse_path` in long format.
+
+    The merged rows are sorted by `sort_by`, see `SORT_KEYS`. If it includes the draft
+    key, a dense integer `draft_key` is assigned to each draft, reusing the keys in
+    `known_draft_keys` (those of the other view of the set) where they exist.
+    """
+    dtypes = schema(gzip_path)
+    parts_dir = tempfile.mkdtemp(dir=os.path.dirname(target_path))
+    sparse_dir = tempfile.mkdtemp(dir=os.path.dirname(target_path))
+
+    try:
+        row_offset = 0
+        for part_num, (header, body) in enumerate(_csv_chunks(gzip_path)):
+            df = _read_csv_chunk(header, body, dtypes, row_offset)
+            if sparse_path is not None:
+                df = df.with_row_index(cache.ROW_ID, offset=row_offset)
+                _write_part(_sparse_chunk(df), sparse_dir, f"part-{part_num:05}")
+            row_offset += df.height
+            _write_part(df, parts_dir, f"part-{part_num:05}", partition_by)
+
+        _merge_parts(
+            parts_dir,
+            target_path,
+            partitioned=partition_by is not None,
+            sort_by=sort_by,
+            known_draft_keys=known_draft_keys,
+        )
+        if sparse_path is not None:
+            _merge_parts(sparse_dir, sparse_path)
+    finally:
+        shutil.rmtree(parts_dir)
+        shutil.rmtree(sparse_dir)
+
+    os.remove(gzip_path)
+
+
+def _existing_partition_by(target_path: str) -> cache.PartitionBy | None:
+    if not os.path.isdir(target_path):
+        return None
+    with os.scandir(target_path) as data_dir:
+        keys = {entry.name.partition("=")[0] for entry in data_dir if entry.is_dir()}
+    for partition_by, key in cache.PARTITION_KEYS.items():
+        if key in keys:
+            return partition_by
+    return None
+
+
+def _append_zipped_file(
+    gzip_path: str,
+    target_paths: list[str],
+    target_path: str,
+    keys: tuple[str, ...],
+    sparse_path: str | None = None,
+    sort_by: tuple[str, ...] = (),
+    known_draft_keys: pl.DataFrame | None = None,
+) -> tuple[datetime.date, datetime.date, int] | None:
+    """
+    Convert a newer dump and append only the rows whose `keys` are not found in the
+    existing files `target_paths` of the data set at `target_path`, which may be
+    partitioned. New rows continue the row ids of the sparse table, if there is one,
+    and the draft keys of the existing files and `known_draft_keys`, if they are keyed.
+    The appended rows are sorted by `sort_by`.
+
+    Returns the range of draft dates of the appended rows and their count, or None if
+    there are no new rows.
+    """
+    mode = "update"
+    work_dir = tempfile.mkdtemp(dir=os.path.dirname(target_path))
+
+    try:
+        dump_path = os.path.join(work_dir, "dump.parquet")
+        dump_sparse_path = (
+            os.path.join(work_dir, "dump_sparse.parquet") if sparse_path else None
+        )
+        existing = pl.scan_parquet(target_paths, hive_partitioning=False)
+        if pl.Categorical in existing.collect_schema().values():
+            _rewrite_files(target_paths, cache.parquet_options(cache.DataDir.EXTERNAL))
+            existing = pl.scan_parquet(target_paths, hive_partitioning=False)
+        existing_schema = existing.collect_schema()
+        _process_zipped_file(gzip_path, dump_path, sparse_path=dump_sparse_path)
+        dump = pl.scan_parquet(dump_path)
+        keyed = ColName.DRAFT_KEY in existing_schema
+        if dump.collect_schema() != pl.Schema(
+            (name, dtype)
+            for name, dtype in existing_schema.items()
+            if name != ColName.DRAFT_KEY
+        ):
+            cache.spells_print(
+                "error",
+                f"Columns of the new dump don't match {target_path},"
+                + " use `spells refresh` instead",
+            )
+            return None
+
+        new_df = dump.join(
+            existing.select(keys), on=keys, how="anti", join_nulls=True
+        ).collect()
+        if new_df.is_empty():
+            return None
+
+        start, end = new_df.select(
+            _draft_date_expr().min().alias("start"),
+            _draft_date_expr().max().alias("end"),
+        ).row(0)
+
+        if sparse_path is not None:
+            next_id = existing.select(pl.col(cache.ROW_ID).max()).collect().item()
+            new_df = new_df.sort(cache.ROW_ID).with_row_index(
+                "new_row_id", offset=0 if next_id is None else next_id + 1
+            )
+            new_sparse_path = os.path.join(work_dir, "new_sparse.parquet")
+            pl.scan_parquet(dump_sparse_path).join(
+                new_df.lazy().select(cache.ROW_ID, "new_row_id"), on=cache.ROW_ID
+            ).with_columns(pl.col("new_row_id").alias(cache.ROW_ID)).drop(
+                "new_row_id"
+            ).collect().write_parquet(new_sparse_path)
+            new_df = new_df.with_columns(pl.col("new_row_id").alias(cache.ROW_ID))
+
+        draft_keys = None
+        if keyed:
+            existing_keys = existing.select(ColName.DRAFT_ID, ColName.DRAFT_KEY)
+            if known_draft_keys is not None:
+                existing_keys = pl.concat([existing_keys, known_draft_keys.lazy()])
+            draft_keys = _draft_keys(new_df.lazy(), existing_keys.unique().collect())
+        new_df = (
+            _with_draft_keys(new_df.lazy(), draft_keys, sort_by)
+            .select(existing_schema.names())
+            .collect()
+        )
+
+        options = cache.parquet_options(cache.DataDir.EXTERNAL)
+        partition_by = _existing_partition_by(target_path)
+        if partition_by is not None:
+            _write_part(
+                new_df,
+                target_path,
+                f"update-{time.time_ns()}",
+                partition_by,
+                options=options,
+            )
+        else:
+            new_path = os.path.join(work_dir, "new.parquet")
+            new_df.write_parquet(new_path)
+            merged_path = os.path.join(work_dir, os.path.basename(target_path))
+            _sink_parquet(
+                pl.scan_parquet([target_path, new_path]), merged_path, options
+            )
+            os.replace(merged_path, target_path)
+
+        if sparse_path is not None:
+            merged_sparse_path = os.path.join(work_dir, os.path.basename(sparse_path))
+            _sink_parquet(
+                pl.scan_parquet([sparse_path, new_sparse_path]),
+                merged_sparse_path,
+                options,
+            )
+            os.replace(merged_sparse_path, sparse_path)
+    finally:
+        shutil.rmtree(work_dir)
+
+    cache.spells_print(mode, f"Appended {new_df.height} rows to {target_path}")
+    return start, end, new_df.height
+
+
+def _other_view(dataset_type: View) -> View:
+    return View.GAME if dataset_type == View.DRAFT else View.DRAFT
+
+
+def _dataset_path(set_code, dataset_type: View, event_type) -> str:
+    dataset_file = DATASET_TEMPLATE.format(
+        set_code=set_code, dataset_type=dataset_type, event_type=event_type
+    )
+    return os.path.join(cache.external_set_path(set_code), dataset_file)
+
+
+def _download_dataset(set_code, dataset_type: View, event_type) -> str:
+    """
+    Download the gzipped csv to the set directory, resuming any partial download left
+    by a previous attempt, and return its path.
+    """
+    if not os.path.isdir(set_dir := cache.external_set_path(set_code)):
+        os.makedirs(set_dir, exist_ok=True)
+
+    dataset_path = _dataset_path(set_code, dataset_type, event_type)
+    download.download(
+        RESOURCE_TEMPLATE.format(dataset_type=dataset_type)
+        + os.path.basename(dataset_path),
+        dataset_path,
+    )
+    return dataset_path
+
+
+def update_data_set(
+    set_code,
+    dataset_type: View,
+    event_type=cache.EventType.PREMIER,
+) -> tuple[datetime.date, datetime.date] | None:
+    """
+    Download the latest dump and append its new rows to the existing data set. Returns
+    the range of draft dates of the new rows, if any, so the caller can invalidate the
+    local cache covering them.
+    """
+    mode = "update"
+    cache.spells_print(mode, f"Downloading {dataset_type} dataset from 17Lands.com")
+
+    target_path = cache.data_file_path(set_code, dataset_type, event_type=event_type)
+    dataset_path = _download_dataset(set_code, dataset_type, event_type)
+
+    sparse_path = cache.data_file_path(
+        set_code, f"{dataset_type}_sparse", event_type=event_type
+    )
+    result = _append_zipped_file(
+        dataset_path,
+        cache.data_file_paths(set_code, dataset_type, event_type=event_type),
+        target_path,
+        INCREMENT_KEYS[dataset_type],
+        sparse_path=sparse_path if os.path.isfile(sparse_path) else None,
+        sort_by=SORT_KEYS[dataset_type],
+        known_draft_keys=_known_draft_keys(
+            cache.data_file_paths(
+                set_code, _other_view(dataset_type), event_type=event_type
+            )
+        ),
+    )
+    if result is None:
+        return None
+
+    start, end, num_rows = result
+    _record_update(set_code, dataset_type, start, end, num_rows, event_type)
+    return start, end
+
+
+def _record_update(
+    set_code: str,
+    dataset_type: View,
+    start: datetime.date,
+    end: datetime.date,
+    num_rows: int,
+    event_type=cache.EventType.PREMIER,
+):
+    """
+    Append the draft date range changed by an update to the set's update log
+    """
+    log_path = cache.data_file_path(set_code, "updates", event_type=event_type)
+    log_df = pl.DataFrame(
+        {
+            "view": [str(dataset_type)],
+            "updated_at": [datetime.datetime.now()],
+            "start_date": [start],
+            "end_date": [end],
+            "num_rows": [num_rows],
+        }
+    )
+    if os.path.isfile(log_path):
+        log_df = pl.concat([pl.read_parquet(log_path), log_df])
+    log_df.write_parquet(log_path)
 
 
 def download_data_set(
@@ -235,47 +1278,80 @@ def download_data_set(
     event_type=cache.EventType.PREMIER,
     force_download=False,
     clear_set_cache=True,
+    partition_by: cache.PartitionBy | None = None,
+    sparse: bool = False,
+    downloaded: bool = False,
 ):
+    """
+    Download the dump and convert it to parquet. If `downloaded`, the gzipped csv has
+    already been fetched to the set directory and only the conversion is run.
+    """
     mode = "refresh" if force_download else "add"
-    cache.spells_print(mode, f"Downloading {dataset_type} dataset from 17Lands.com")
+    if not downloaded:
+        cache.spells_print(mode, f"Downloading {dataset_type} dataset from 17Lands.com")
 
     if not os.path.isdir(set_dir := cache.external_set_path(set_code)):
         os.makedirs(set_dir)
 
     target_path = cache.data_file_path(set_code, dataset_type)
 
-    if os.path.isfile(target_path) and not force_download:
+    if os.path.exists(target_path) and not force_download:
         cache.spells_print(
             mode,
             f"File {target_path} already exists, use `spells refresh {set_code}` to overwrite",
         )
         return 1
 
-    dataset_file = DATASET_TEMPLATE.format(
-        set_code=set_code, dataset_type=dataset_type, event_type=event_type
-    )
-    dataset_path = os.path.join(cache.external_set_path(set_code), dataset_file)
-    wget.download(
-        RESOURCE_TEMPLATE.format(dataset_type=dataset_type) + dataset_file,
-        out=dataset_path,
-    )
-    print()
+    if downloaded:
+        dataset_path = _dataset_path(set_code, dataset_type, event_type)
+    else:
+        dataset_path = _download_dataset(set_code, dataset_type, event_type)
 
     cache.spells_print(
         mode, "Unzipping and transforming to parquet (this might take a few minutes)..."
     )
-    _process_zipped_file(dataset_path, target_path)
-    cache.spells_print(mode, f"Wrote file {target_path}")
+    start = time.perf_counter()
+    sparse_path = cache.data_file_path(set_code, f"{dataset_type}_sparse")
+    # game files take the keys of the draft file, while a draft file only reuses the
+    # keys of a game file that isn't about to be refreshed along with it
+    known_draft_keys = (
+        _known_draft_keys(
+            cache.data_file_paths(
+                set_code, _other_view(dataset_type), event_type=event_type
+            )
+        )
+        if dataset_type == View.GAME or not force_download
+        else None
+    )
+    _process_zipped_file(
+        dataset_path,
+        target_path,
+        partition_by=partition_by,
+        sparse_path=sparse_path if sparse else None,
+        sort_by=SORT_KEYS[dataset_type],
+        known_draft_keys=known_draft_keys,
+    )
+    if not sparse:
+        # row ids of a stale sparse table would no longer match
+        _remove_path(sparse_path)
+    cache.spells_print(
+        mode, f"Wrote file {target_path} in {time.perf_counter() - start:.1f}s"
+    )
     if clear_set_cache:
         cache.clean(set_code)
 
     return 0
 
 
-def write_card_file(draft_set_code: str, force_download=False) -> int:
+def write_card_file(
+    draft_set_code: str,
+    force_download=False,
+    card_data: Future | None = None,
+) -> int:
     """
     Write a csv containing basic information about draftable cards, such as rarity,
-    set symbol, color, mana cost, and type.
+    set symbol, color, mana cost, and type. `card_data` may be a future of
+    `cards.fetch_card_data` started ahead of time.
     """
     mode = "refresh" if force_download else "add"
 
@@ -292,7 +1368,7 @@ def write_card_file(draft_set_code: str, force_download=False) -> int:
 
     draft_filepath = cache.data_file_path(draft_set_code, View.DRAFT)
 
-    if not os.path.isfile(draft_filepath):
+    if not os.path.exists(draft_filepath):
         cache.spells_print(mode, f"Error: No draft file for set {draft_set_code}")
         return 1
 
@@ -305,7 +1381,9 @@ def write_card_file(draft_set_code: str, force_download=False) -> int:
         if re.search(pattern, name) is not None
     ]
 
-    card_df = cards.card_df(draft_set_code, names)
+    card_df = cards.card_df(
+        draft_set_code, names, card_data.result() if card_data is not None else None
+    )
 
     card_df.write_parquet(card_filepath)
 
@@ -313,28 +1391,166 @@ def write_card_file(draft_set_code: str, force_download=False) -> int:
     return 0
 
 
-def get_set_context(set_code: str, force_download=False) -> int:
-    mode = "refresh" if force_download else "add"
+def write_catalog(set_code: str, categorical: bool | None = None) -> int:
+    """
+    Write the set's catalog, describing the draft, game and card files that exist: their
+    fingerprints, row counts, time ranges and columns, along with the card names in
+    column order and the set context, so that readers needn't scan the files for them.
+    The catalog also records whether the set is read with `categorical` columns, kept
+    from the previous catalog if None.
+    """
+    mode = "catalog"
+    if categorical is None:
+        categorical = cache.is_categorical(cache.read_catalog(set_code))
+
+    files = {}
+    for dataset_type in (View.DRAFT, View.GAME, View.CARD):
+        fingerprint = cache.fingerprint(set_code, dataset_type)
+        if fingerprint is None:
+            continue
+        lf = pl.scan_parquet(
+            cache.data_file_paths(set_code, dataset_type), hive_partitioning=False
+        )
+        file_schema = lf.collect_schema()
+        time_cols = [
+            col for col in (ColName.DRAFT_TIME, ColName.GAME_TIME) if col in file_schema
+        ]
+        stats = (
+            lf.with_columns(parse_timestamps(file_schema))
+            .select(
+                pl.len().alias("num_rows"),
+                *(pl.col(col).min().alias(f"{col}_min") for col in time_cols),
+                *(pl.col(col).max().alias(f"{col}_max") for col in time_cols),
+            )
+            .collect()
+            .row(0, named=True)
+        )
+        files[dataset_type] = {
+            "fingerprint": fingerprint,
+            "num_rows": stats["num_rows"],
+            "time_range": {
+                col: [stats[f"{col}_min"], stats[f"{col}_max"]] for col in time_cols
+            },
+            "columns": {name: str(dtype) for name, dtype in file_schema.items()},
+        }
+
+    catalog = {"set_code": set_code, "categorical": categorical, "files": files}
+    # files written with categoricals by earlier versions are read as such
+    catalog["categorical"] = cache.is_categorical(catalog)
+
+    if View.DRAFT in files and View.CARD in files:
+        prefix = f"{ColName.PACK_CARD}_"
+        names = [
+            col[len(prefix) :]
+            for col in files[View.DRAFT]["columns"]
+            if col.startswith(prefix)
+        ]
+        card_names = pl.read_parquet(
+            cache.data_file_path(set_code, View.CARD), columns=[ColName.NAME]
+        )[ColName.NAME]
+        if set(names) != set(card_names):
+            cache.spells_print(
+                "error", f"Names mismatch between card and draft file for {set_code}"
+            )
+            return 1
+        catalog["names"] = names
+
+    context_fp = cache.data_file_path(set_code, "context")
+    if os.path.isfile(context_fp):
+        context_df = pl.read_parquet(context_fp)
+        if len(context_df) == 1:
+            catalog["set_context"] = context_df.to_dicts()[0]
+            catalog["set_context_fingerprint"] = cache.fingerprint(set_code, "context")
+
+    cache.write_catalog(set_code, catalog)
+    cache.spells_print(mode, f"Wrote file {cache.catalog_path(set_code)}")
+    return 0
+
+
+def _draft_days(
+    set_code: str,
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+) -> pl.DataFrame:
+    """
+    The number of drafts started and the greatest pick number on each draft date in the
+    inclusive range [start, end], reading only the draft time, pack number and pick
+    number columns of the partitions covering the range. The draft time bounds are
+    pushed down to the parquet reader, which skips row groups by their statistics in
+    files sorted by draft key.
+    """
+    lf = pl.scan_parquet(
+        cache.data_file_paths(set_code, View.DRAFT, start=start, end=end),
+        hive_partitioning=False,
+    ).select(ColName.DRAFT_TIME, ColName.PACK_NUMBER, ColName.PICK_NUMBER)
+    lf = lf.with_columns(parse_timestamps(lf.collect_schema()))
+    if start is not None:
+        lf = lf.filter(
+            pl.col(ColName.DRAFT_TIME)
+            >= datetime.datetime.combine(start, datetime.time())
+        )
+    if end is not None:
+        lf = lf.filter(
+            pl.col(ColName.DRAFT_TIME)
+            < datetime.datetime.combine(
+                end + datetime.timedelta(days=1), datetime.time()
+            )
+        )
+
+    return (
+        lf.group_by(_draft_date_expr().alias(ColName.DRAFT_DATE))
+        .agg(
+            ((pl.col(ColName.PACK_NUMBER) == 0) & (pl.col(ColName.PICK_NUMBER) == 0))
+            .sum()
+            .alias(ColName.NUM_DRAFTS),
+            pl.col(ColName.PICK_NUMBER).max().alias("max_pick_number"),
+        )
+        .sort(ColName.DRAFT_DATE)
+        .collect()
+    )
+
+
+def get_set_context(
+    set_code: str,
+    force_download=False,
+    date_range: tuple[datetime.date, datetime.date] | None = None,
+) -> int:
+    """
+    Write the set context, the release date and number of picks per pack, from the
+    drafts started on each day, which are kept in the "draft_days" file. If
+    `date_range` is given, as after an update, only the days in that range are
+    counted again.
+    """
+    mode = "refresh" if force_download else "update" if date_range else "add"
 
     context_fp = cache.data_file_path(set_code, "context")
+    days_fp = cache.data_file_path(set_code, "draft_days")
     cache.spells_print(mode, "Calculating set context")
-    if os.path.isfile(context_fp) and not force_download:
+    if os.path.isfile(context_fp) and not force_download and date_range is None:
         cache.spells_print(
             mode,
             f"File {context_fp} already exists, use `spells refresh {set_code}` to overwrite",
         )
         return 1
 
-    df = summon(
-        set_code,
-        columns=[ColName.NUM_DRAFTS],
-        group_by=[ColName.DRAFT_DATE, ColName.PICK_NUM],
-    )
+    if date_range is not None and os.path.isfile(days_fp):
+        start, end = date_range
+        days_df = pl.concat(
+            [
+                pl.read_parquet(days_fp).filter(
+                    ~pl.col(ColName.DRAFT_DATE).is_between(start, end)
+                ),
+                _draft_days(set_code, start, end),
+            ]
+        ).sort(ColName.DRAFT_DATE)
+    else:
+        days_df = _draft_days(set_code)
+    days_df.write_parquet(days_fp)
 
-    context_df = df.filter(pl.col(ColName.NUM_DRAFTS) > 1000).select(
+    context_df = days_df.filter(pl.col(ColName.NUM_DRAFTS) > MIN_RELEASE_DRAFTS).select(
         [
             pl.col(ColName.DRAFT_DATE).min().alias("release_date"),
-            pl.col(ColName.PICK_NUM).max().alias("picks_per_pack"),
+            (pl.col("max_pick_number").max() + 1).alias("picks_per_pack"),
         ]
     )
 
@@ -2,18 +2,42 @@
 spells.filter (don't import as builtin filter) returns a function from_spec
 that takes a dict-specified filter and returns a Filter object that records
 the dependent column names and contains a filter expression for use in polars.
+
+Filters also record inclusive bounds implied for individual columns, e.g. a
+filter `{'$and': [{'lhs': 'a', 'op': '>', 'rhs': 1}, {'b': 2}]}` has bounds
+`{'a': (1, None), 'b': (2, 2)}`, which can be used to prune partitioned data.
+
+The timestamp columns draft_time and game_time are datetimes when read, so string values
+compared with them are parsed, in the format of the csv files or ISO 8601.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+import datetime
 import functools
+from typing import Any
 
 import polars as pl
 
+from spells.schema import TIMESTAMP_FORMATS
+
 
 @dataclass(frozen=True)
 class Filter:
     expr: pl.Expr
     lhs: frozenset[str]
+    bounds: dict[str, tuple[Any, Any]] = field(default_factory=dict)
+
+
+def _tighter(b1, b2, pick):
+    if b1 is None or b2 is None:
+        return b2 if b1 is None else b1
+    return pick(b1, b2)
+
+
+def _looser(b1, b2, pick):
+    if b1 is None or b2 is None:
+        return None
+    return pick(b1, b2)
 
 
 def __negate(f: Filter) -> Filter:
@@ -21,31 +45,55 @@ def __negate(f: Filter) -> Filter:
 
 
 def _or(f1: Filter, f2: Filter) -> Filter:
-    return Filter(expr=f1.expr | f2.expr, lhs=f1.lhs.union(f2.lhs))
+    bounds = {}
+    for col in f1.bounds.keys() & f2.bounds.keys():
+        (lo1, hi1), (lo2, hi2) = f1.bounds[col], f2.bounds[col]
+        try:
+            bounds[col] = (_looser(lo1, lo2, min), _looser(hi1, hi2, max))
+        except TypeError:
+            pass
+    return Filter(expr=f1.expr | f2.expr, lhs=f1.lhs.union(f2.lhs), bounds=bounds)
 
 
 def _and(f1: Filter, f2: Filter) -> Filter:
-    return Filter(expr=f1.expr & f2.expr, lhs=f1.lhs.union(f2.lhs))
+    bounds = {**f1.bounds, **f2.bounds}
+    for col in f1.bounds.keys() & f2.bounds.keys():
+        (lo1, hi1), (lo2, hi2) = f1.bounds[col], f2.bounds[col]
+        try:
+            bounds[col] = (_tighter(lo1, lo2, max), _tighter(hi1, hi2, min))
+        except TypeError:
+            bounds[col] = f1.bounds[col]
+    return Filter(expr=f1.expr & f2.expr, lhs=f1.lhs.union(f2.lhs), bounds=bounds)
 
 
 def _filter_eq(lhs: str, rhs: str) -> Filter:
-    return Filter(expr=pl.col(lhs) == rhs, lhs=frozenset({lhs}))
+    return Filter(
+        expr=pl.col(lhs) == rhs, lhs=frozenset({lhs}), bounds={lhs: (rhs, rhs)}
+    )
 
 
 def _filter_leq(lhs: str, rhs: str) -> Filter:
-    return Filter(expr=pl.col(lhs) <= rhs, lhs=frozenset({lhs}))
+    return Filter(
+        expr=pl.col(lhs) <= rhs, lhs=frozenset({lhs}), bounds={lhs: (None, rhs)}
+    )
 
 
 def _filter_geq(lhs: str, rhs: str) -> Filter:
-    return Filter(expr=pl.col(lhs) >= rhs, lhs=frozenset({lhs}))
+    return Filter(
+        expr=pl.col(lhs) >= rhs, lhs=frozenset({lhs}), bounds={lhs: (rhs, None)}
+    )
 
 
 def _filter_in(lhs: str, rhs: str) -> Filter:
-    return Filter(expr=pl.col(lhs).is_in(rhs), lhs=frozenset({lhs}))
+    try:
+        bounds = {lhs: (min(rhs), max(rhs))} if len(rhs) else {}
+    except TypeError:
+        bounds = {}
+    return Filter(expr=pl.col(lhs).is_in(rhs), lhs=frozenset({lhs}), bounds=bounds)
 
 
 def _filter_gt(lhs: str, rhs: str) -> Filter:
-    return __negate(_filter_leq(lhs, rhs))
+    return replace(__negate(_filter_leq(lhs, rhs)), bounds={lhs: (rhs, None)})
 
 
 def _filter_nin(lhs: str, rhs: str) -> Filter:
@@ -57,7 +105,7 @@ def _filter_neq(lhs: str, rhs: str) -> Filter:
 
 
 def _filter_lt(lhs: str, rhs: str) -> Filter:
-    return __negate(_filter_geq(lhs, rhs))
+    return replace(__negate(_filter_geq(lhs, rhs)), bounds={lhs: (None, rhs)})
 
 
 filter_fn_map = {
@@ -72,7 +120,20 @@ filter_fn_map = {
 }
 
 
+def _parse_timestamp(lhs: str, rhs):
+    if isinstance(rhs, (list, tuple, set)):
+        return type(rhs)(_parse_timestamp(lhs, value) for value in rhs)
+    if not isinstance(rhs, str):
+        return rhs
+    try:
+        return datetime.datetime.strptime(rhs, TIMESTAMP_FORMATS[lhs])
+    except ValueError:
+        return datetime.datetime.fromisoformat(rhs)
+
+
 def _base(lhs, rhs, op="=") -> Filter:
+    if lhs in TIMESTAMP_FORMATS:
+        rhs = _parse_timestamp(lhs, rhs)
     return filter_fn_map[op](lhs, rhs)
 
 
@@ -0,0 +1,118 @@
+"""
+Expressions over a block of name-mapped card columns, e.g. `pack_card_{name}` for every
+name, weighted by a vector of card attributes, e.g. the mana value of each card.
+
+Written per card, a horizontal max or count over the block is one expression per card,
+thousands of them in a plan using a few such columns. The expressions here batch the
+cards by weight instead, with one horizontal reduction per distinct weight, which is a
+handful for attributes like mana value or rarity.
+"""
+
+import math
+from typing import Any
+
+import polars as pl
+
+
+def card_weights(
+    names: list[str], card_context: dict[str, dict], attr: str
+) -> dict[str, Any]:
+    """
+    The weight vector of the card attribute `attr`, with None for missing values
+    """
+    weights = {}
+    for name in names:
+        value = card_context[name][attr]
+        if isinstance(value, float) and math.isnan(value):
+            value = None
+        weights[name] = value
+    return weights
+
+
+def _levels(weights: dict[str, Any]) -> dict[Any, list[str]]:
+    levels = {}
+    for name, weight in weights.items():
+        if weight is not None:
+            levels.setdefault(weight, []).append(name)
+    return levels
+
+
+def _present(prefix: str, names: list[str]) -> pl.Expr:
+    return pl.any_horizontal(pl.col(f"{prefix}_{name}") > 0 for name in names)
+
+
+def _count(prefix: str, names: list[str]) -> pl.Expr:
+    return pl.sum_horizontal(pl.col(f"{prefix}_{name}") > 0 for name in names)
+
+
+def weighted_max(prefix: str, weights: dict[str, Any]) -> pl.Expr:
+    """
+    The greatest weight of the cards with a positive `prefix` column, null if none
+    """
+    levels = _levels(weights)
+    return pl.coalesce(
+        [
+            pl.when(_present(prefix, levels[weight])).then(weight)
+            for weight in sorted(levels, reverse=True)
+        ]
+        + [pl.lit(None)]
+    )
+
+
+def weighted_min(prefix: str, weights: dict[str, Any]) -> pl.Expr:
+    """
+    The least weight of the cards with a positive `prefix` column, null if none
+    """
+    levels = _levels(weights)
+    return pl.coalesce(
+        [
+            pl.when(_present(prefix, levels[weight])).then(weight)
+            for weight in sorted(levels)
+        ]
+        + [pl.lit(None)]
+    )
+
+
+def count_greater(prefix: str, weights: dict[str, Any], value: pl.Expr) -> pl.Expr:
+    """
+    The number of cards with a positive `prefix` column and a weight greater than
+    `value`
+    """
+    levels = _levels(weights)
+    return pl.sum_horizontal(
+        [pl.lit(0, dtype=pl.UInt32)]
+        + [
+            pl.when(pl.lit(weight) > value).then(_count(prefix, level_names))
+            for weight, level_names in levels.items()
+        ]
+    )
+
+
+def count_less(prefix: str, weights: dict[str, Any], value: pl.Expr) -> pl.Expr:
+    """
+    The number of cards with a positive `prefix` column and a weight less than `value`
+    """
+    levels = _levels(weights)
+    return pl.sum_horizontal(
+        [pl.lit(0, dtype=pl.UInt32)]
+        + [
+            pl.when(pl.lit(weight) < value).then(_count(prefix, level_names))
+            for weight, level_names in levels.items()
+        ]
+    )
+
+
+def weighted_sum(prefix: str, weights: dict[str, Any]) -> pl.Expr:
+    """
+    The sum of the `prefix` columns times their weights, cards without a weight
+    counting as zero
+    """
+    levels = _levels(weights)
+    return pl.sum_horizontal(
+        [pl.lit(0)]
+        + [
+            pl.sum_horizontal(pl.col(f"{prefix}_{name}") for name in level_names)
+            * weight
+            for weight, level_names in levels.items()
+        ]
+    )
@@ -6,6 +6,7 @@
 # converted to use by polars
 
 import csv
+import gzip
 import re
 from typing import Dict
 
@@ -136,12 +137,44 @@ COLUMN_TYPES = (
     (re.compile(r"^oppo_total_cards_drawn_or_tutored$"), pl.Int8),
 )
 
+# timestamp columns, read from the csv as strings and stored as datetimes
+TIMESTAMP_FORMATS = {
+    "draft_time": "%Y-%m-%d %H:%M:%S",
+    "game_time": "%Y-%m-%d %H-%M-%S",
+}
+
+# low-cardinality string columns of sets added with `--categorical`, stored as strings
+# and encoded as categoricals when read, see `draft_data._scan_view`. polars 1.14 can't
+# read a categorical column with nulls from parquet under a pushed-down predicate.
+CATEGORICAL_COLUMNS = (
+    "expansion",
+    "event_type",
+    "rank",
+    "pick",
+    "opp_rank",
+    "main_colors",
+    "splash_colors",
+    "opp_colors",
+)
+
+
+def parse_timestamps(dtypes: Dict[str, pl.datatypes.DataType]) -> list[pl.Expr]:
+    """
+    Expressions parsing the timestamp columns that are present and still strings
+    """
+    return [
+        pl.col(column).str.to_datetime(time_format, strict=False)
+        for column, time_format in TIMESTAMP_FORMATS.items()
+        if dtypes.get(column) == pl.String
+    ]
+
 
 def schema(
     filename: str, print_missing: bool = False
 ) -> Dict[str, pl.datatypes.DataType]:
     dtypes: Dict[str, pl.datatypes.DataType] = {}
-    with open(filename, encoding="utf-8") as f:
+    opener = gzip.open if filename.endswith(".gz") else open
+    with opener(filename, "rt", encoding="utf-8") as f:
         columns = csv.DictReader(f).fieldnames
     if columns is None:
         raise ValueError(f"Could not read fieldnames from {filename}")
@@ -0,0 +1,140 @@
+"""
+Test targeted invalidation and eviction of the local cache, locking of its indexes,
+parquet write options and base cubes
+"""
+
+import datetime
+import os
+import subprocess
+import sys
+import time
+
+import polars as pl
+
+import spells.cache
+
+
+def test_invalidate(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    df = pl.DataFrame({"num_drafts": [1]})
+    date = datetime.date
+    spells.cache.write_cache("TST", "early", df, (None, date(2024, 9, 30)))
+    spells.cache.write_cache("TST", "late", df, (date(2024, 10, 7), None))
+    spells.cache.write_cache("TST", "all", df)
+
+    assert spells.cache.invalidate("TST", date(2024, 10, 1), date(2024, 10, 6)) == 1
+
+    assert spells.cache.cache_exists("TST", "early")
+    assert spells.cache.cache_exists("TST", "late")
+    assert not spells.cache.cache_exists("TST", "all")
+    assert sorted(spells.cache.read_cache_index("TST")) == ["early", "late"]
+
+
+def test_parquet_options(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    with open(tmp_path / "spells.toml", "w") as f:
+        f.write(
+            "[parquet]\ncompression = 'zstd'\ncompression_level = 3\n\n"
+            + "[parquet.external]\nrow_group_size = 1000\n"
+        )
+    monkeypatch.setenv("SPELLS_PARQUET_COMPRESSION_LEVEL", "9")
+    monkeypatch.setenv("SPELLS_PARQUET_STATISTICS", "full")
+
+    assert spells.cache.parquet_options(spells.cache.DataDir.EXTERNAL) == {
+        "compression": "zstd",
+        "compression_level": 9,
+        "row_group_size": 1000,
+        "statistics": "full",
+    }
+    assert spells.cache.parquet_options(spells.cache.DataDir.CACHE) == {
+        "compression": "zstd",
+        "compression_level": 9,
+        "statistics": "full",
+    }
+
+
+def test_cube(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    with open(tmp_path / "spells.toml", "w") as f:
+        f.write("[cube]\ngroup_by = ['name', 'rank']\n")
+    assert spells.cache.cube_group_by() == ["name", "rank"]
+    monkeypatch.setenv("SPELLS_CUBE_GROUP_BY", "rank,draft_date")
+    assert spells.cache.cube_group_by() == ["rank", "draft_date"]
+
+    draft_path = spells.cache.data_file_path("TST", "draft")
+    os.makedirs(os.path.dirname(draft_path))
+    pl.DataFrame({"rank": ["gold"]}).write_parquet(draft_path)
+    assert spells.cache.read_cube_meta("TST", "draft") is None
+
+    cube_df = pl.DataFrame({"rank": ["gold"], "num_taken": [1]})
+    spells.cache.write_cube("TST", "draft", cube_df, ["rank"], {"num_taken": "abc"})
+
+    meta = spells.cache.read_cube_meta("TST", "draft")
+    assert meta["group_by"] == ["rank"]
+    assert meta["columns"] == {"num_taken": "abc"}
+    assert meta["fingerprint"] == spells.cache.fingerprint("TST", "draft")
+    assert pl.read_parquet(spells.cache.cube_path("TST", "draft")).equals(cube_df)
+
+
+def test_evict(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    df = pl.DataFrame({"num_drafts": range(1000)})
+    for key in ("a", "b", "c"):
+        spells.cache.write_cache("TST", key, df)
+    spells.cache.record_hit("TST", "a")
+    size = spells.cache.read_cache_index("TST")["a"]["size"]
+    assert spells.cache.read_cache_index("TST")["a"]["hits"] == 1
+
+    monkeypatch.setenv("SPELLS_CACHE_MAX_SIZE", f"{2 * size / 1024}KiB")
+    assert spells.cache.cache_budget() == {"max_size": 2 * size}
+    spells.cache.write_cache("OTH", "d", df)
+
+    # the least recently read file of any set goes first
+    assert sorted(spells.cache.read_cache_index("TST")) == ["a"]
+    assert not spells.cache.cache_exists("TST", "b")
+    assert spells.cache.cache_exists("OTH", "d")
+
+    monkeypatch.delenv("SPELLS_CACHE_MAX_SIZE")
+    monkeypatch.setenv("SPELLS_CACHE_MAX_AGE_DAYS", "0")
+    assert spells.cache.evict(keep=("OTH", "d")) == 1
+    assert spells.cache.read_cache_index("TST") == {}
+    assert spells.cache.cache_exists("OTH", "d")
+
+
+def test_scan_cache_evicted(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    df = pl.DataFrame({"num_drafts": range(1000)})
+    spells.cache.write_cache("TST", "a", df)
+    assert "Parquet SCAN" in spells.cache.scan_cache("TST", "a").explain()
+
+    # a scanned file evicted by a later write is still read in full
+    monkeypatch.setenv("SPELLS_CACHE_MAX_AGE_DAYS", "0")
+    lf = spells.cache.scan_cache("TST", "a")
+    spells.cache.write_cache("OTH", "b", df)
+    assert not spells.cache.cache_exists("TST", "a")
+    assert lf.collect().equals(df)
+
+
+def test_index_lock(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    spells.cache.write_cache("TST", "a", pl.DataFrame({"num_drafts": [1]}))
+
+    # processes updating the same index wait for each other
+    script = (
+        "import spells.cache\nfor _ in range(200): spells.cache.record_hit('TST', 'a')"
+    )
+    procs = [subprocess.Popen([sys.executable, "-c", script]) for _ in range(2)]
+    assert [proc.wait() for proc in procs] == [0, 0]
+    assert spells.cache.read_cache_index("TST")["a"]["hits"] == 400
+
+    # a lock file left by a process that died is broken
+    lock_path = os.path.join(
+        spells.cache.data_dir_path(spells.cache.DataDir.CACHE), spells.cache.INDEX_LOCK
+    )
+    assert not os.path.exists(lock_path)
+    open(lock_path, "w").close()
+    stale = time.time() - spells.cache.INDEX_LOCK_STALE_SECONDS - 1
+    os.utime(lock_path, (stale, stale))
+    spells.cache.record_hit("TST", "a")
+    assert spells.cache.read_cache_index("TST")["a"]["hits"] == 401
+    assert not os.path.exists(lock_path)
@@ -0,0 +1,179 @@
+"""
+Small synthetic sets converted like `spells add`, for testing summon end to end
+"""
+
+import csv
+import datetime
+import gzip
+import os
+import random
+
+import pytest
+import polars as pl
+
+import spells.cache
+import spells.external
+from spells.cards import CardAttr
+from spells.enums import View
+
+NAMES = ["Alpha", "Beta Strike", "Gamma", "Delta Land"]
+START = datetime.datetime(2024, 9, 24, 12, 0, 0)
+
+
+def _draft_rows(rng: random.Random, set_code: str, num_drafts: int):
+    for draft in range(num_drafts):
+        draft_time = START + datetime.timedelta(minutes=rng.randint(0, 4 * 24 * 60))
+        # an empty rank or pick reads as null, for null group keys
+        rank = rng.choice(["bronze", "gold", "mythic", ""])
+        wins, losses = rng.randint(0, 7), rng.randint(0, 3)
+        for pack_number in range(3):
+            for pick_number in range(3):
+                row = {
+                    "expansion": set_code,
+                    "event_type": "PremierDraft",
+                    "draft_id": f"d{draft:04d}",
+                    "draft_time": draft_time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "rank": rank,
+                    "event_match_wins": wins,
+                    "event_match_losses": losses,
+                    "pack_number": pack_number,
+                    "pick_number": pick_number,
+                    "pick": rng.choice(NAMES + [""]),
+                    "pick_maindeck_rate": rng.choice([0.5, 1.0, ""]),
+                    "pick_sideboard_in_rate": 0.0,
+                }
+                for name in NAMES:
+                    row[f"pack_card_{name}"] = rng.choice([0, 0, 1])
+                for name in NAMES:
+                    row[f"pool_{name}"] = rng.choice([0, 1, 2])
+                row["user_n_games_bucket"] = rng.choice([1, 10, 100])
+                row["user_game_win_rate_bucket"] = rng.choice([0.4, 0.6])
+                yield row
+
+
+def _game_rows(rng: random.Random, set_code: str, drafts: dict[str, datetime.datetime]):
+    for draft_id, draft_time in drafts.items():
+        for match_number in (1, 2):
+            for game_number in range(1, rng.randint(1, 3) + 1):
+                game_time = draft_time + datetime.timedelta(hours=match_number)
+                row = {
+                    "expansion": set_code,
+                    "event_type": "PremierDraft",
+                    "draft_id": draft_id,
+                    "draft_time": draft_time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "game_time": game_time.strftime("%Y-%m-%d %H-%M-%S"),
+                    "build_index": 0,
+                    "match_number": match_number,
+                    "game_number": game_number,
+                    "rank": "gold",
+                    "opp_rank": "",
+                    "main_colors": rng.choice(["WU", "BR", ""]),
+                    "splash_colors": "",
+                    "on_play": rng.choice(["True", "False"]),
+                    "num_mulligans": 0,
+                    "opp_num_mulligans": rng.choice([0, 1]),
+                    "opp_colors": "WB",
+                    "num_turns": rng.randint(5, 12),
+                    "won": rng.choice(["True", "False"]),
+                }
+                for prefix in ("deck", "sideboard", "drawn", "tutored", "opening_hand"):
+                    for name in NAMES:
+                        row[f"{prefix}_{name}"] = rng.choice([0, 0, 1, 2])
+                row["user_n_games_bucket"] = 100
+                row["user_game_win_rate_bucket"] = 0.55
+                yield row
+
+
+def _write_csv(path: str, rows: list[dict]):
+    with gzip.open(path, "wt", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def make_set(tmp_path, monkeypatch):
+    """
+    Write and convert a small random set under a temporary data home, with draft, game
+    and card files, a set context, a catalog and, if `sparse`, the sparse card tables,
+    with the `partition_by` and `categorical` options of `spells add`. The last
+    `holdout` drafts are left out, and are downloaded by `spells update` with the rest.
+    """
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    monkeypatch.setattr(spells.external, "MIN_RELEASE_DRAFTS", 0)
+    # the dumps are written where downloads go
+    monkeypatch.setattr(
+        spells.external, "_download_dataset", spells.external._dataset_path
+    )
+
+    def make(
+        set_code: str = "TST",
+        seed: int = 0,
+        num_drafts: int = 40,
+        sparse: bool = False,
+        partition_by: spells.cache.PartitionBy | None = None,
+        categorical: bool = False,
+        holdout: int = 0,
+    ) -> str:
+        rng = random.Random(seed)
+        os.makedirs(spells.cache.external_set_path(set_code))
+        draft_rows = list(_draft_rows(rng, set_code, num_drafts))
+        drafts = {row["draft_id"]: row["draft_time"] for row in draft_rows}
+        drafts = {
+            draft_id: datetime.datetime.fromisoformat(draft_time)
+            for draft_id, draft_time in drafts.items()
+        }
+        rows = {
+            View.DRAFT: draft_rows,
+            View.GAME: list(_game_rows(rng, set_code, drafts)),
+        }
+        held_out = set(list(drafts)[num_drafts - holdout :])
+
+        for view in (View.DRAFT, View.GAME):
+            gzip_path = spells.external._dataset_path(
+                set_code, view, spells.cache.EventType.PREMIER
+            )
+            _write_csv(
+                gzip_path,
+                [row for row in rows[view] if row["draft_id"] not in held_out],
+            )
+            spells.external._process_zipped_file(
+                gzip_path,
+                spells.cache.data_file_path(set_code, view),
+                partition_by=partition_by,
+                sparse_path=spells.cache.data_file_path(set_code, f"{view}_sparse")
+                if sparse
+                else None,
+                sort_by=spells.external.SORT_KEYS[view],
+                known_draft_keys=spells.external._known_draft_keys(
+                    spells.cache.data_file_paths(set_code, View.DRAFT)
+                )
+                if view == View.GAME
+                else None,
+            )
+            # the next dump has every draft
+            _write_csv(gzip_path, rows[view])
+
+        cards = [
+            {attr: None for attr in CardAttr}
+            | {
+                "name": name,
+                "set_code": set_code,
+                "color": "W",
+                "rarity": "common",
+                "color_identity": "W",
+                "card_type": "Land" if "Land" in name else "Creature",
+                "mana_value": float(mana_value),
+                "is_bonus_sheet": False,
+                "is_dfc": False,
+            }
+            for mana_value, name in enumerate(NAMES)
+        ]
+        pl.DataFrame(cards).write_parquet(
+            spells.cache.data_file_path(set_code, View.CARD)
+        )
+        spells.external.get_set_context(set_code)
+        spells.external.write_catalog(set_code, categorical=categorical)
+        return set_code
+
+    return make
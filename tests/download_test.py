@@ -0,0 +1,106 @@
+"""
+Test resumable range downloads against a local http server
+"""
+
+import hashlib
+import http.server
+import json
+import os
+import threading
+
+import pytest
+
+import spells.download
+
+CONTENT = bytes(range(256)) * 40
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    content = CONTENT
+    etag = '"' + hashlib.md5(CONTENT).hexdigest() + '"'
+    accept_ranges = True
+    requested = []
+
+    def _send_headers(self, status, length, content_range=None):
+        self.send_response(status)
+        self.send_header("Content-Length", str(length))
+        self.send_header("ETag", self.etag)
+        if self.accept_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if content_range is not None:
+            self.send_header("Content-Range", content_range)
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._send_headers(200, len(self.content))
+
+    def do_GET(self):
+        byte_range = self.headers.get("Range")
+        if byte_range is None or not self.accept_ranges:
+            self._send_headers(200, len(self.content))
+            self.wfile.write(self.content)
+            return
+        start, end = map(int, byte_range.removeprefix("bytes=").split("-"))
+        type(self).requested.append(start)
+        body = self.content[start : end + 1]
+        self._send_headers(206, len(body), f"bytes {start}-{end}/{len(self.content)}")
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    RangeHandler.requested = []
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/data.csv.gz"
+    httpd.shutdown()
+
+
+def test_download(server, tmp_path):
+    path = str(tmp_path / "data.csv.gz")
+    spells.download.download(server, path, range_size=1000)
+
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    assert sorted(RangeHandler.requested) == list(range(0, len(CONTENT), 1000))
+    assert os.listdir(tmp_path) == ["data.csv.gz"]
+
+
+def test_download_resume(server, tmp_path):
+    path = str(tmp_path / "data.csv.gz")
+    with open(path + ".part", "wb") as f:
+        f.write(CONTENT[:3000] + bytes(len(CONTENT) - 3000))
+    with open(path + ".part.json", "w") as f:
+        json.dump(
+            {"size": len(CONTENT), "etag": RangeHandler.etag, "done": [0, 1000, 2000]},
+            f,
+        )
+
+    spells.download.download(server, path, range_size=1000)
+
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    assert sorted(RangeHandler.requested) == list(range(3000, len(CONTENT), 1000))
+
+
+def test_download_bad_checksum(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(RangeHandler, "etag", '"' + "0" * 32 + '"')
+    path = str(tmp_path / "data.csv.gz")
+
+    with pytest.raises(spells.download.DownloadError):
+        spells.download.download(server, path, range_size=1000)
+    assert os.listdir(tmp_path) == []
+
+
+def test_download_no_ranges(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(RangeHandler, "accept_ranges", False)
+    path = str(tmp_path / "data.csv.gz")
+    spells.download.download(server, path, range_size=1000)
+
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    assert RangeHandler.requested == []
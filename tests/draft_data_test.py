@@ -0,0 +1,509 @@
+"""
+Test expression building for name-dependent columns, roll-ups of base sums, and base
+aggregates against a query per column
+"""
+
+import datetime
+import functools
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+import spells.cache
+import spells.draft_data
+import spells.filter
+from spells.columns import ColDef, ColSpec, get_specs
+from spells.draft_data import (
+    _base_agg_df,
+    _base_agg_lf,
+    _base_sum_cols,
+    _cached_parts,
+    _card_weights,
+    _decode,
+    _hydrate_col_defs,
+    _missing_manifest,
+    get_names,
+    _name_lookup_expr,
+    _scan_view,
+    _set_manifest,
+    _view_select,
+    summon,
+    write_cube,
+    _roll_up,
+    _roll_up_cols,
+    _scanned_columns,
+    _signatures,
+)
+from spells.enums import ColName, ColType, View
+from spells.manifest import Manifest
+
+NAMES = ["A", "B", "C"]
+
+
+def test_name_lookup_expr():
+    df = pl.DataFrame({"pick": ["B", None, "A", "C"], "x": [1, 2, 3, 4]})
+
+    lookup = _name_lookup_expr("pick", NAMES, [1.5, pl.lit(None), 2])
+    assert df.select(lookup.alias("v"))["v"].to_list() == [None, None, 1.5, 2.0]
+
+    conditional = _name_lookup_expr("pick", NAMES, [pl.col("x"), 0, pl.col("x") * 2])
+    assert df.select(conditional.alias("v"))["v"].to_list() == [0, None, 3, 8]
+
+    # expressions without columns aren't constants per card
+    conditional = _name_lookup_expr("pick", NAMES, [pl.len(), 0, pl.lit(3)])
+    assert df.select(conditional.alias("v"))["v"].to_list() == [0, None, 4, 3]
+
+
+def test_card_weights(make_set):
+    code = make_set()
+    specs = get_specs()
+    # not linear in the deck counts, though linear on small counts or single rows
+    nonlinear = {
+        "deck_capped": lambda name: pl.col(f"deck_{name}").clip(upper_bound=5) * 2,
+        "deck_relative": lambda name: pl.col(f"deck_{name}")
+        - pl.col(f"deck_{name}").min(),
+        "deck_len": lambda name: pl.col(f"deck_{name}") * pl.len(),
+    }
+    for col, expr in nonlinear.items():
+        specs[col] = ColSpec(col_type=ColType.NAME_SUM, expr=expr, views=[View.GAME])
+    col_def_map = _hydrate_col_defs(code, specs)
+    names = get_names(code)
+    card_df = pl.read_parquet(spells.cache.data_file_path(code, View.CARD))
+    mana_values = dict(zip(card_df["name"], card_df["mana_value"]))
+
+    memo = {}
+    base, weights, _, _ = _card_weights("deck_mana_value", col_def_map, names, memo)
+    assert base == "deck"
+    assert weights == {name: mana_values[name] for name in names}
+    base, weights, _, _ = _card_weights("deck_spells", col_def_map, names, memo)
+    assert base == "deck"
+    assert set(weights.values()) <= {0, 1}
+    for col in nonlinear:
+        assert _card_weights(col, col_def_map, names, memo) is None
+
+
+def test_scanned_columns(tmp_path):
+    path = str(tmp_path / "data.parquet")
+    pl.DataFrame({"a": [1], "b": [2], "c": [3]}).write_parquet(path)
+
+    plan = pl.scan_parquet(path).select(pl.col("a") + pl.col("b")).explain()
+    assert _scanned_columns(plan) == {path: (2, 3)}
+
+    plan = pl.scan_parquet(path).explain()
+    assert _scanned_columns(plan) == {path: (3, 3)}
+
+
+def _col_def(name, col_type, dependencies=()):
+    return ColDef(
+        name=name,
+        col_type=col_type,
+        expr=pl.col(name),
+        views={View.DRAFT},
+        dependencies=set(dependencies),
+        signature=name + col_type,
+    )
+
+
+def test_roll_up():
+    col_def_map = {
+        "rank": _col_def("rank", ColType.GROUP_BY),
+        "draft_date": _col_def("draft_date", ColType.GROUP_BY),
+        "taken": _col_def("taken", ColType.PICK_SUM, ["pick"]),
+        "pick": _col_def("pick", ColType.FILTER_ONLY),
+    }
+    m = Manifest(
+        columns=("taken",),
+        col_def_map=col_def_map,
+        base_view_group_by=frozenset({"rank"}),
+        view_cols={View.DRAFT: frozenset({"rank", "taken", "draft_date"})},
+        group_by=("rank",),
+        filter=spells.filter.from_spec({"draft_date": 2}),
+    )
+    meta = {
+        "group_by": ["draft_date", "rank"],
+        "columns": _signatures(m, ["rank", "draft_date", "taken"]),
+    }
+    assert "pick" in meta["columns"]
+    assert _roll_up_cols(meta, m, ["taken"]) == ("taken",)
+    assert _roll_up_cols({**meta, "group_by": ["rank"]}, m, ["taken"]) == ()
+    assert _roll_up_cols({**meta, "group_by": ["rank"]}, m, ["taken"], filtered=True)
+
+    # a dependency of a sum redefined
+    col_def_map["pick"] = _col_def("pick", ColType.GROUP_BY)
+    assert _roll_up_cols(meta, m, ["taken"]) == ()
+
+    cube = pl.LazyFrame(
+        {
+            "rank": ["gold", "gold", "gold", "silver"],
+            "draft_date": [1, 2, 2, 2],
+            "taken": [1, 2, 3, None],
+        }
+    )
+    rolled_up = _roll_up(cube, m, ["taken"]).sort("rank").collect()
+    assert rolled_up.rows() == [("gold", 5), ("silver", None)]
+
+
+def _per_column_agg(set_code: str, m: Manifest) -> pl.DataFrame:
+    """
+    The base aggregate with a query per name-mapped column, each unpivoted by name, and
+    every partial aggregate collected on its own and joined on the group by columns
+    """
+    group_by = sorted(m.base_view_group_by)
+    is_name_gb = ColName.NAME in group_by
+    nonname_gb = tuple(gb for gb in group_by if gb != ColName.NAME)
+    names = get_names(set_code)
+
+    agg_dfs = []
+    for view, cols in m.view_cols.items():
+        if view == View.CARD:
+            continue
+        base_df = _view_select(
+            _scan_view(set_code, view), cols, m.col_def_map, is_agg_view=False
+        )
+        if m.filter is not None:
+            base_df = base_df.filter(m.filter.expr)
+
+        sum_cols = tuple(
+            c
+            for c in sorted(cols)
+            if m.col_def_map[c].col_type in (ColType.PICK_SUM, ColType.GAME_SUM)
+        )
+        if sum_cols:
+            name_col = (pl.col(ColName.PICK).alias(ColName.NAME),) if is_name_gb else ()
+            sum_df = base_df.select(nonname_gb + name_col + sum_cols)
+            sum_df = sum_df.group_by(group_by).sum() if group_by else sum_df.sum()
+            agg_dfs.append(_decode(sum_df.collect()))
+
+        for col in sorted(cols):
+            if m.col_def_map[col].col_type != ColType.NAME_SUM:
+                continue
+            name_df = base_df.select(
+                tuple(pl.col(f"{col}_{name}").alias(name) for name in names)
+                + nonname_gb
+            )
+            name_df = (
+                name_df.group_by(nonname_gb).sum() if nonname_gb else name_df.sum()
+            )
+            name_df = name_df.unpivot(
+                index=nonname_gb or None, value_name=col, variable_name=ColName.NAME
+            )
+            if not is_name_gb:
+                name_df = name_df.drop(ColName.NAME)
+                name_df = (
+                    name_df.group_by(nonname_gb).sum() if nonname_gb else name_df.sum()
+                )
+            agg_dfs.append(name_df.collect())
+
+    if group_by:
+        joined_df = functools.reduce(
+            lambda left, right: left.join(
+                right, on=group_by, how="full", coalesce=True, join_nulls=True
+            ),
+            agg_dfs,
+        )
+    else:
+        joined_df = pl.concat(agg_dfs, how="horizontal")
+    return joined_df.select(sorted(joined_df.columns))
+
+
+def _assert_same_agg(left: pl.DataFrame, right: pl.DataFrame, group_by):
+    sort_by = sorted(group_by)
+    if sort_by:
+        left = left.sort(sort_by, nulls_last=True)
+        right = right.sort(sort_by, nulls_last=True)
+    assert_frame_equal(left, right)
+
+
+@pytest.mark.parametrize(
+    "group_by, filter_spec",
+    [
+        ([], None),
+        (["name"], None),
+        (["main_colors"], None),
+        (["name", "main_colors"], {"lhs": "num_turns", "op": ">=", "rhs": 9}),
+    ],
+)
+def test_name_sum_single_query(make_set, group_by, filter_spec):
+    code = make_set()
+    columns = ["deck", "sideboard", "drawn", "won_deck", "opening_hand"]
+    m, _ = _set_manifest(code, get_specs(), columns, group_by, filter_spec, None, None)
+
+    _assert_same_agg(_base_agg_df(code, m), _per_column_agg(code, m), group_by)
+
+
+@pytest.mark.parametrize(
+    "group_by, columns",
+    [
+        # null ranks are only drafted, every game is ranked gold
+        (["rank"], ["num_taken", "pack_card", "num_games", "deck"]),
+        # null picks group only the draft sums under a null name
+        (["name"], ["num_taken", "pack_card", "deck", "drawn"]),
+        (["rank", "event_type"], ["num_drafts", "num_games", "won_deck"]),
+    ],
+)
+def test_base_agg_null_keys(make_set, group_by, columns):
+    code = make_set()
+    m, _ = _set_manifest(code, get_specs(), columns, group_by, None, None, None)
+
+    base_agg_df = _base_agg_df(code, m)
+    assert base_agg_df[group_by[0]].null_count() == 1
+    _assert_same_agg(base_agg_df, _per_column_agg(code, m), group_by)
+
+
+@pytest.mark.parametrize(
+    "group_by, columns",
+    [
+        (["expansion", "rank"], None),
+        (["name"], ["num_taken", "deck", "gp_wr", "alsa"]),
+        (["main_colors", "won"], ["num_games", "num_won", "deck"]),
+    ],
+)
+def test_summon_sets_concurrently(make_set, group_by, columns):
+    codes = [make_set("TST", seed=0), make_set("TS2", seed=1)]
+
+    def summon_sets(max_workers, **kwargs):
+        return summon(codes, columns, group_by, max_workers=max_workers, **kwargs)
+
+    sequential_df = summon_sets(1, read_cache=False, write_cache=False)
+    if "expansion" in group_by:
+        assert set(sequential_df["expansion"]) == set(codes)
+
+    # the sets are calculated, and cached, concurrently
+    assert_frame_equal(summon_sets(2), sequential_df)
+    assert_frame_equal(summon_sets(2), sequential_df)
+
+
+def test_summon_lazy(make_set):
+    code = make_set()
+    filter_spec = {"lhs": "num_turns", "op": "<=", "rhs": 9}
+
+    def assert_lazy_equal(columns, group_by, filter_spec=None, **kwargs):
+        lazy_df = summon(code, columns, group_by, filter_spec, lazy=True, **kwargs)
+        eager_df = summon(code, columns, group_by, filter_spec, **kwargs)
+        assert_frame_equal(lazy_df.collect(), eager_df)
+
+    # the lazy path joins the partial aggregates, on null keys too
+    for group_by, columns in (
+        (["rank"], ["num_taken", "pack_card", "num_games"]),
+        (["name"], ["num_taken", "pack_card", "deck"]),
+    ):
+        m, _ = _set_manifest(code, get_specs(), columns, group_by, None, None, None)
+        lazy_df = _base_agg_lf(code, m).collect()
+        _assert_same_agg(lazy_df, _base_agg_df(code, m), group_by)
+
+    no_cache = {"read_cache": False, "write_cache": False}
+    assert_lazy_equal(None, None, **no_cache)
+    assert_lazy_equal(["num_taken", "pack_card", "num_games"], ["rank"], **no_cache)
+    assert_lazy_equal(["num_taken", "deck", "gih_wr"], ["name"], **no_cache)
+    assert_lazy_equal(["num_games", "deck"], ["main_colors"], filter_spec, **no_cache)
+
+    # partial aggregates rolled up from the base cube
+    write_cube(code, ["rank", "event_type"])
+    columns, group_by = ["num_taken", "num_drafts", "pack_card"], ["event_type"]
+    explanation = summon(code, columns, group_by, explain=True)
+    assert "draft_cube" in explanation.sets[0].plans
+    assert_lazy_equal(columns, group_by, {"rank": "gold"}, write_cache=False)
+
+    # base columns rolled up from a cached aggregate and the rest calculated
+    summon(code, ["num_games", "deck"], ["main_colors", "won"], filter_spec)
+    assert_lazy_equal(["num_games", "deck"], ["main_colors", "won"], filter_spec)
+    columns = ["num_games", "deck", "drawn"]
+    explanation = summon(code, columns, ["main_colors"], filter_spec, explain=True)
+    assert explanation.sets[0].cached_parts
+    assert_lazy_equal(columns, ["main_colors"], filter_spec, write_cache=False)
+
+
+def test_summon_from_cube(make_set):
+    code = make_set()
+    queries = [
+        (["num_seen", "deck", "gih_wr"], ["name"], None),
+        (["num_seen", "deck", "gih_wr"], ["name"], {"rank": "gold"}),
+        (["num_taken", "num_seen", "deck"], ["name"], None),
+        (["num_taken", "num_games"], ["rank"], None),
+    ]
+    no_cache = {"read_cache": False, "write_cache": False}
+    expected = [summon(code, *query, **no_cache) for query in queries]
+
+    write_cube(code)
+    for query, expected_df in zip(queries, expected):
+        assert "draft_cube" in summon(code, *query, explain=True).sets[0].plans
+        assert_frame_equal(summon(code, *query, **no_cache), expected_df)
+
+
+def test_summon_from_cached_parts(make_set, monkeypatch):
+    code = make_set()
+    group_by = ["rank"]
+    summon(code, ["num_taken", "pack_card"], group_by)
+    columns = ["num_taken", "pack_card", "num_drafts", "deck"]
+
+    m, _ = _set_manifest(code, get_specs(), columns, group_by, None, None, None)
+    parts = _cached_parts(code, m, None)
+    assert [cols for _, cols in parts.values()] == [("num_taken", "pack_card")]
+    missing_m = _missing_manifest(m, parts)
+    assert set(missing_m.view_cols[View.DRAFT]) >= {"num_drafts", "rank"}
+    assert not {"num_taken", "pack_card"} & set().union(*missing_m.view_cols.values())
+
+    # only the missing base columns are calculated
+    calculated = []
+
+    def base_agg_df(set_code, m, **kwargs):
+        calculated.extend(_base_sum_cols(m))
+        return _base_agg_df(set_code, m, **kwargs)
+
+    monkeypatch.setattr(spells.draft_data, "_base_agg_df", base_agg_df)
+    assembled_df = summon(code, columns, group_by, write_cache=False)
+    assert sorted(calculated) == ["deck", "num_drafts"]
+    assert assembled_df["rank"].null_count() == 1
+
+    uncached_df = summon(code, columns, group_by, read_cache=False, write_cache=False)
+    assert_frame_equal(assembled_df, uncached_df)
+
+
+def test_summon_filter_redefined(make_set):
+    code = make_set()
+    group_by = ["rank"]
+    no_cache = {"read_cache": False, "write_cache": False}
+
+    # format days of another release date
+    filter_spec = {"format_day": 1}
+    cached_df = summon(code, ["num_taken"], group_by, filter_spec)
+    release_date = spells.draft_data._get_set_context(code, None)["release_date"]
+    set_context = {"release_date": release_date + datetime.timedelta(days=1)}
+    for columns in (["num_taken"], ["num_taken", "pack_card"]):
+        expected = summon(
+            code, columns, group_by, filter_spec, set_context=set_context, **no_cache
+        )
+        assert not expected.select(cached_df.columns).equals(cached_df)
+        assert_frame_equal(
+            summon(code, columns, group_by, filter_spec, set_context=set_context),
+            expected,
+        )
+
+    # an extension filter column defined again
+    filter_spec = {"lhs": "late", "op": ">=", "rhs": 0}
+    for first in (1, 2):
+        late = {
+            "late": ColSpec(
+                col_type=ColType.FILTER_ONLY,
+                expr=pl.col("pick_number") - first,
+                views=[View.DRAFT],
+            )
+        }
+        assert_frame_equal(
+            summon(code, ["num_taken"], group_by, filter_spec, extensions=late),
+            summon(code, ["num_taken"], group_by, filter_spec, late, **no_cache),
+        )
+
+
+@pytest.mark.parametrize(
+    "partition_by", [spells.cache.PartitionBy.DAY, spells.cache.PartitionBy.WEEK]
+)
+def test_summon_partitioned(make_set, partition_by):
+    code = make_set("TST", partition_by=partition_by)
+    ref = make_set("REF")
+
+    # filters that match no rows of some partitions
+    draft_id = pl.read_parquet(spells.cache.data_file_path(ref, View.DRAFT))[
+        "draft_id"
+    ][0]
+    for columns, group_by, filter_spec in (
+        (["num_taken", "pack_card"], ["name"], {"draft_id": draft_id}),
+        (["num_games", "deck"], ["main_colors"], {"draft_id": draft_id}),
+        (
+            ["num_games", "deck"],
+            ["rank"],
+            {"lhs": "num_turns", "op": ">=", "rhs": 9},
+        ),
+    ):
+        kwargs = {"read_cache": False, "write_cache": False}
+        assert_frame_equal(
+            summon(code, columns, group_by, filter_spec, **kwargs),
+            summon(ref, columns, group_by, filter_spec, **kwargs),
+        )
+
+
+def test_summon_from_cached_parts_by_name(make_set):
+    code = make_set()
+    no_cache = {"read_cache": False, "write_cache": False}
+    # the cached aggregate has a null name group for picks of no card
+    summon(code, ["num_taken", "num_seen", "pack_card"], ["name"])
+
+    for columns in (["num_seen", "pack_card"], ["num_seen", "deck", "gih_wr"]):
+        explanation = summon(code, columns, ["name"], explain=True)
+        assert explanation.sets[0].cached_parts
+        assert_frame_equal(
+            summon(code, columns, ["name"], write_cache=False),
+            summon(code, columns, ["name"], **no_cache),
+        )
+
+
+def test_summon_from_cached_parts_filtered(make_set):
+    code = make_set()
+    no_cache = {"read_cache": False, "write_cache": False}
+    group_by, filter_spec = ["rank"], {"format_day": 1}
+    summon(code, ["num_taken", "pack_card"], group_by, filter_spec)
+
+    columns = ["num_taken", "pack_card", "num_drafts"]
+    release_date = spells.draft_data._get_set_context(code, None)["release_date"]
+    for set_context in (
+        None,
+        {"release_date": release_date + datetime.timedelta(days=1)},
+    ):
+        explanation = summon(
+            code, columns, group_by, filter_spec, set_context=set_context, explain=True
+        )
+        # the filter selects other rows under another release date
+        assert bool(explanation.sets[0].cached_parts) == (set_context is None)
+        assert_frame_equal(
+            summon(
+                code,
+                columns,
+                group_by,
+                filter_spec,
+                set_context=set_context,
+                write_cache=False,
+            ),
+            summon(
+                code,
+                columns,
+                group_by,
+                filter_spec,
+                set_context=set_context,
+                **no_cache,
+            ),
+        )
+
+
+@pytest.mark.parametrize("partition_by", [None, spells.cache.PartitionBy.DAY])
+def test_summon_categorical(make_set, partition_by):
+    code = make_set("TST", sparse=True, partition_by=partition_by, categorical=True)
+    ref = make_set("REF", sparse=True, partition_by=partition_by)
+
+    # stored as strings, read as categoricals
+    file_path = spells.cache.data_file_paths(code, View.DRAFT)[0]
+    assert pl.read_parquet_schema(file_path)["rank"] == pl.String
+    lf_schema = _scan_view(code, View.DRAFT).collect_schema()
+    assert lf_schema["rank"] == pl.Categorical
+    assert lf_schema["pick"] == pl.Enum(get_names(code))
+
+    date = datetime.date(2024, 9, 25)
+    for columns, group_by, filter_spec in (
+        (["num_taken"], ["rank"], {"draft_date": date}),
+        (["num_taken", "pack_card", "deck"], ["name"], {"rank": "gold"}),
+        (
+            ["num_games", "deck"],
+            ["main_colors"],
+            {"lhs": "num_turns", "op": ">=", "rhs": 9},
+        ),
+        (["num_seen", "gih_wr"], ["name", "rank"], None),
+    ):
+        kwargs = {"read_cache": False, "write_cache": False}
+        expected = summon(ref, columns, group_by, filter_spec, **kwargs)
+        assert_frame_equal(
+            summon(code, columns, group_by, filter_spec, **kwargs), expected
+        )
+        assert_frame_equal(
+            summon(code, columns, group_by, filter_spec, lazy=True, **kwargs).collect(),
+            expected,
+        )
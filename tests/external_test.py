@@ -0,0 +1,673 @@
+"""
+Test conversion of gzipped 17Lands csv files to parquet
+"""
+
+import datetime
+import gzip
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import polars as pl
+
+import spells.cache
+import spells.draft_data
+import spells.enums
+import spells.external
+import spells.schema
+
+HEADER = "draft_id,draft_time,pack_number,pick_number,pick,pack_card_A,pack_card_B\n"
+ROWS = [
+    "a1,2024-09-24 18:31:41,0,0,A,1,1\n",
+    "a1,2024-09-24 18:31:41,0,1,B,0,1\n",
+    "b2,2024-09-25 01:02:03,0,0,B,1,1\n",
+    "b2,2024-09-25 01:02:03,0,1,A,1,0\n",
+]
+
+
+@pytest.fixture
+def gzip_path(tmp_path):
+    path = tmp_path / "draft_data_public.TST.PremierDraft.csv.gz"
+    with gzip.open(path, "wt") as f:
+        f.write(HEADER + "".join(ROWS))
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 60, 1024])
+def test_csv_chunks(gzip_path, chunk_size):
+    chunks = list(spells.external._csv_chunks(gzip_path, chunk_size))
+
+    assert all(header == HEADER.encode() for header, _ in chunks)
+    assert b"".join(body for _, body in chunks) == "".join(ROWS).encode()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 60, 1024])
+def test_csv_chunks_quoted_newline(tmp_path, chunk_size):
+    rows = ROWS[:1] + ['a1,2024-09-24 18:31:41,0,1,"B\n""quoted""\n",0,1\n'] + ROWS[2:]
+    path = tmp_path / "draft_data_public.TST.PremierDraft.csv.gz"
+    with gzip.open(path, "wt") as f:
+        f.write(HEADER + "".join(rows))
+
+    chunks = list(spells.external._csv_chunks(str(path), chunk_size))
+    assert b"".join(body for _, body in chunks) == "".join(rows).encode()
+    df = pl.concat(
+        pl.read_csv(header + body, infer_schema=False) for header, body in chunks
+    )
+    assert df["pick"].to_list() == ["A", 'B\n"quoted"\n', "B", "A"]
+
+
+def test_process_zipped_file(gzip_path, tmp_path):
+    target_path = str(tmp_path / "TST_PremierDraft_draft.parquet")
+    spells.external._process_zipped_file(gzip_path, target_path)
+
+    df = pl.read_parquet(target_path)
+    assert df.schema["pack_card_A"] == pl.Int8
+    assert df.schema["draft_time"] == pl.Datetime
+    assert df["draft_id"].to_list() == ["a1", "a1", "b2", "b2"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "TST_PremierDraft_draft.parquet"
+    ]
+
+
+def test_process_zipped_file_draft_keys(tmp_path):
+    draft_path = str(tmp_path / "draft_data_public.TST.PremierDraft.csv.gz")
+    with gzip.open(draft_path, "wt") as f:
+        f.write(HEADER + "".join(reversed(ROWS)))
+    target_path = str(tmp_path / "TST_PremierDraft_draft.parquet")
+    spells.external._process_zipped_file(
+        draft_path,
+        target_path,
+        sort_by=spells.external.SORT_KEYS[spells.enums.View.DRAFT],
+    )
+
+    df = pl.read_parquet(target_path)
+    assert df.columns[0] == "draft_key"
+    assert df["draft_key"].to_list() == [0, 0, 1, 1]
+    assert df["draft_id"].to_list() == ["a1", "a1", "b2", "b2"]
+    assert df["pick_number"].to_list() == [0, 1, 0, 1]
+
+    game_path = str(tmp_path / "game_data_public.TST.PremierDraft.csv.gz")
+    with gzip.open(game_path, "wt") as f:
+        f.write("draft_id,match_number,game_number\n")
+        f.write("z9,1,1\n" + "b2,1,2\n" + "b2,1,1\n")
+    game_target_path = str(tmp_path / "TST_PremierDraft_game.parquet")
+    spells.external._process_zipped_file(
+        game_path,
+        game_target_path,
+        sort_by=spells.external.SORT_KEYS[spells.enums.View.GAME],
+        known_draft_keys=spells.external._known_draft_keys([target_path]),
+    )
+
+    game_df = pl.read_parquet(game_target_path)
+    assert game_df.rows() == [(1, "b2", 1, 1), (1, "b2", 1, 2), (2, "z9", 1, 1)]
+
+
+def test_process_zipped_file_bad_schema(tmp_path, capsys):
+    gzip_path = str(tmp_path / "game_data_public.TST.PremierDraft.csv.gz")
+    with gzip.open(gzip_path, "wt") as f:
+        f.write("draft_id,won,num_turns\n")
+        f.write("a1,True,7\n" * 3 + "a1,False,seven\n" + "b2,false,9\n")
+    target_path = str(tmp_path / "TST_PremierDraft_game.parquet")
+
+    spells.external._process_zipped_file(gzip_path, target_path)
+
+    df = pl.read_parquet(target_path)
+    assert df.schema == pl.Schema(
+        {"draft_id": pl.String, "won": pl.Boolean, "num_turns": pl.Int8}
+    )
+    assert df["won"].to_list() == [True, True, True, False, False]
+    assert df["num_turns"].to_list() == [7, 7, 7, None, 9]
+    assert "column num_turns to Int8, writing nulls (rows 3)" in capsys.readouterr().out
+
+
+def test_process_zipped_file_bad_timestamp(tmp_path, capsys):
+    gzip_path = str(tmp_path / "draft_data_public.TST.PremierDraft.csv.gz")
+    with gzip.open(gzip_path, "wt") as f:
+        f.write(HEADER + ROWS[0] + ROWS[1].replace("2024-09-24", "24/09/2024"))
+    target_path = str(tmp_path / "TST_PremierDraft_draft.parquet")
+
+    spells.external._process_zipped_file(gzip_path, target_path)
+
+    df = pl.read_parquet(target_path)
+    assert df["draft_time"].to_list() == [
+        datetime.datetime(2024, 9, 24, 18, 31, 41),
+        None,
+    ]
+    assert "column draft_time to Datetime" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "partition_by, expected",
+    [
+        (
+            spells.cache.PartitionBy.DAY,
+            ["draft_date=2024-09-24", "draft_date=2024-09-25"],
+        ),
+        (spells.cache.PartitionBy.WEEK, ["draft_week_start=2024-09-23"]),
+    ],
+)
+def test_process_zipped_file_partitioned(gzip_path, tmp_path, partition_by, expected):
+    target_path = tmp_path / "TST_PremierDraft_draft.parquet"
+    spells.external._process_zipped_file(
+        gzip_path, str(target_path), partition_by=partition_by
+    )
+
+    assert sorted(p.name for p in target_path.iterdir()) == expected
+    df = pl.read_parquet(target_path)
+    assert df.height == len(ROWS)
+
+
+def test_process_zipped_file_sparse(gzip_path, tmp_path):
+    target_path = str(tmp_path / "TST_PremierDraft_draft.parquet")
+    sparse_path = str(tmp_path / "TST_PremierDraft_draft_sparse.parquet")
+    spells.external._process_zipped_file(
+        gzip_path, target_path, sparse_path=sparse_path
+    )
+
+    df = pl.read_parquet(target_path)
+    assert df[spells.cache.ROW_ID].to_list() == [0, 1, 2, 3]
+
+    sparse_df = pl.read_parquet(sparse_path).with_columns(
+        pl.col("prefix", "name").cast(pl.String)
+    )
+    assert sorted(sparse_df.rows()) == [
+        (0, "pack_card", "A", 1),
+        (0, "pack_card", "B", 1),
+        (1, "pack_card", "B", 1),
+        (2, "pack_card", "A", 1),
+        (2, "pack_card", "B", 1),
+        (3, "pack_card", "A", 1),
+    ]
+
+
+NEW_ROWS = [
+    "b2,2024-09-25 01:02:03,0,1,A,1,0\n",
+    "c3,2024-09-27 11:00:00,0,0,A,1,1\n",
+]
+
+
+@pytest.mark.parametrize("partition_by", [None, spells.cache.PartitionBy.DAY])
+def test_append_zipped_file(gzip_path, tmp_path, partition_by):
+    target_path = str(tmp_path / "TST_PremierDraft_draft.parquet")
+    sparse_path = str(tmp_path / "TST_PremierDraft_draft_sparse.parquet")
+    sort_by = spells.external.SORT_KEYS[spells.enums.View.DRAFT]
+    spells.external._process_zipped_file(
+        gzip_path,
+        target_path,
+        partition_by=partition_by,
+        sparse_path=sparse_path,
+        sort_by=sort_by,
+    )
+    with gzip.open(gzip_path, "wt") as f:
+        f.write(HEADER + "".join(ROWS[2:] + NEW_ROWS))
+
+    target_paths = (
+        [
+            str(p)
+            for p in sorted(
+                (tmp_path / "TST_PremierDraft_draft.parquet").rglob("*.parquet")
+            )
+        ]
+        if partition_by
+        else [target_path]
+    )
+    result = spells.external._append_zipped_file(
+        gzip_path,
+        target_paths,
+        target_path,
+        spells.external.INCREMENT_KEYS[spells.enums.View.DRAFT],
+        sparse_path=sparse_path,
+        sort_by=sort_by,
+    )
+
+    date = datetime.date(2024, 9, 27)
+    assert result == (date, date, 1)
+    df = pl.read_parquet(target_path, hive_partitioning=False).sort(spells.cache.ROW_ID)
+    assert df["draft_id"].to_list() == ["a1", "a1", "b2", "b2", "c3"]
+    assert df[spells.cache.ROW_ID].to_list() == [0, 1, 2, 3, 4]
+    assert df["draft_key"].to_list() == [0, 0, 1, 1, 2]
+
+    sparse_df = pl.read_parquet(sparse_path).filter(pl.col(spells.cache.ROW_ID) == 4)
+    assert sparse_df.height == 2
+
+
+def _read_view(set_code, view):
+    path = spells.cache.data_file_path(set_code, view)
+    return pl.read_parquet(path, hive_partitioning=False).sort(spells.cache.ROW_ID)
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+@pytest.mark.parametrize(
+    "partition_by", [None, spells.cache.PartitionBy.DAY, spells.cache.PartitionBy.WEEK]
+)
+def test_update(make_set, partition_by, categorical):
+    View = spells.enums.View
+    code = make_set(
+        "TST",
+        sparse=True,
+        partition_by=partition_by,
+        categorical=categorical,
+        holdout=5,
+    )
+    before = {view: _read_view(code, view) for view in (View.DRAFT, View.GAME)}
+    assert spells.external._update(code) == 0
+
+    draft_keys = {}
+    for view, before_df in before.items():
+        df = _read_view(code, view)
+        assert df.height > before_df.height
+        # existing rows keep their row ids and draft keys, new ones continue them
+        assert df[spells.cache.ROW_ID].to_list() == list(range(df.height))
+        assert df.head(before_df.height).equals(before_df)
+        new_df = df.slice(before_df.height)
+        assert new_df["draft_key"].min() > before_df["draft_key"].max()
+        draft_keys[view] = df.select("draft_id", "draft_key").unique()
+
+        sparse_df = pl.read_parquet(spells.cache.data_file_path(code, f"{view}_sparse"))
+        assert sparse_df[spells.cache.ROW_ID].max() == df.height - 1
+        assert sparse_df[spells.cache.ROW_ID].is_in(new_df[spells.cache.ROW_ID]).any()
+
+    # the views agree on the keys of the new drafts
+    joined = draft_keys[View.GAME].join(draft_keys[View.DRAFT], on="draft_id")
+    assert joined["draft_key"].equals(joined["draft_key_right"], check_names=False)
+
+    assert spells.cache.is_categorical(spells.cache.read_catalog(code)) == categorical
+
+    # the updated set sums like the whole dump converted at once
+    ref = make_set("REF", sparse=True, partition_by=partition_by)
+    for columns, group_by in (
+        (["num_taken", "pack_card", "pool", "deck", "drawn"], ["name"]),
+        (["num_drafts", "num_games", "deck"], ["rank"]),
+    ):
+        kwargs = {"read_cache": False, "write_cache": False}
+        assert spells.draft_data.summon(code, columns, group_by, **kwargs).equals(
+            spells.draft_data.summon(ref, columns, group_by, **kwargs)
+        )
+
+
+def _write_categoricals(set_code):
+    """
+    Rewrite the draft and game files of a set with categorical columns, as earlier
+    versions of `spells add --categorical` wrote them, and a catalog without the flag
+    """
+    View = spells.enums.View
+    with pl.StringCache():
+        for view in (View.DRAFT, View.GAME):
+            for path in spells.cache.data_file_paths(set_code, view):
+                df = pl.read_parquet(path, hive_partitioning=False)
+                df.with_columns(
+                    pl.col(col).cast(pl.Categorical)
+                    for col in spells.schema.CATEGORICAL_COLUMNS
+                    if col in df.columns
+                ).write_parquet(path)
+    spells.external.write_catalog(set_code)
+    catalog = spells.cache.read_catalog(set_code)
+    del catalog["categorical"]
+    spells.cache.write_catalog(set_code, catalog)
+
+
+@pytest.mark.parametrize("partition_by", [None, spells.cache.PartitionBy.DAY])
+def test_categorical_files(make_set, partition_by):
+    View = spells.enums.View
+    code = make_set("TST", sparse=True, partition_by=partition_by, holdout=5)
+    old = make_set("OLD", sparse=True, partition_by=partition_by)
+    ref = make_set("REF", sparse=True, partition_by=partition_by)
+    for set_code in (code, old):
+        _write_categoricals(set_code)
+        assert spells.cache.is_categorical(spells.cache.read_catalog(set_code))
+
+    # nulls in categorical columns don't break filtered reads
+    kwargs = {"read_cache": False, "write_cache": False}
+    for query in (
+        (["num_taken"], ["rank"], {"draft_date": datetime.date(2024, 9, 25)}),
+        (["num_taken"], ["name"], {"lhs": "pick_number", "op": ">=", "rhs": 3}),
+    ):
+        assert spells.draft_data.summon(old, *query, **kwargs).equals(
+            spells.draft_data.summon(ref, *query, **kwargs)
+        )
+
+    # updated and reconverted files are rewritten with strings
+    assert spells.external._update(code) == 0
+    assert spells.external._reconvert(old) == 0
+    for set_code in (code, old):
+        for view in (View.DRAFT, View.GAME):
+            for path in spells.cache.data_file_paths(set_code, view):
+                assert pl.Categorical not in pl.read_parquet_schema(path).values()
+        assert spells.cache.is_categorical(spells.cache.read_catalog(set_code))
+
+        for query in (
+            (["num_taken", "pack_card"], ["name"], {"rank": "gold"}),
+            (["num_games", "deck"], ["main_colors"], {"rank": "gold"}),
+            (["num_games", "deck"], ["main_colors"], {"num_turns": 9}),
+        ):
+            assert spells.draft_data.summon(set_code, *query, **kwargs).equals(
+                spells.draft_data.summon(ref, *query, **kwargs)
+            )
+
+
+def _read_thrift_struct(buf: bytes, pos: int) -> tuple[dict, int]:
+    """Read a struct of the thrift compact protocol, by field id"""
+
+    def varint(pos):
+        value = shift = 0
+        while True:
+            byte = buf[pos]
+            value |= (byte & 0x7F) << shift
+            shift, pos = shift + 7, pos + 1
+            if not byte & 0x80:
+                return value, pos
+
+    def read(kind, pos):
+        if kind in (1, 2):  # booleans, in fields
+            return kind == 1, pos
+        if kind == 3:
+            return buf[pos], pos + 1
+        if kind in (4, 5, 6):
+            value, pos = varint(pos)
+            return (value >> 1) ^ -(value & 1), pos
+        if kind == 7:
+            return buf[pos : pos + 8], pos + 8
+        if kind == 8:
+            size, pos = varint(pos)
+            return buf[pos : pos + size], pos + size
+        if kind in (9, 10):
+            size, elem_kind = buf[pos] >> 4, buf[pos] & 0x0F
+            pos += 1
+            if size == 15:
+                size, pos = varint(pos)
+            values = []
+            for _ in range(size):
+                if elem_kind in (1, 2):  # booleans, in lists
+                    value, pos = buf[pos] == 1, pos + 1
+                else:
+                    value, pos = read(elem_kind, pos)
+                values.append(value)
+            return values, pos
+        if kind == 12:
+            return _read_thrift_struct(buf, pos)
+        raise ValueError(f"unsupported thrift type {kind}")
+
+    fields, field_id = {}, 0
+    while kind := buf[pos] & 0x0F:
+        delta, pos = buf[pos] >> 4, pos + 1
+        if delta:
+            field_id += delta
+        else:
+            field_id, pos = read(4, pos)
+        fields[field_id], pos = read(kind, pos)
+    return fields, pos + 1
+
+
+def _row_groups(path: str) -> list[tuple[int, set[int]]]:
+    """
+    The row count and column compression codecs (1 snappy, 2 gzip, 6 zstd) of each
+    row group of a parquet file, from its footer
+    """
+    with open(path, "rb") as f:
+        buf = f.read()
+    size = int.from_bytes(buf[-8:-4], "little")
+    metadata, _ = _read_thrift_struct(buf[-8 - size : -8], 0)
+    return [
+        (row_group[3], {column[3][4] for column in row_group[1]})
+        for row_group in metadata[4]
+    ]
+
+
+def test_reconvert_parquet_options(make_set, monkeypatch):
+    View = spells.enums.View
+    code = make_set("TST", sparse=True)
+    before = {view: _read_view(code, view) for view in (View.DRAFT, View.GAME)}
+    assert {
+        codec
+        for _, codecs in _row_groups(spells.cache.data_file_path(code, View.DRAFT))
+        for codec in codecs
+    } == {6}
+
+    monkeypatch.setenv("SPELLS_PARQUET_ROW_GROUP_SIZE", "50")
+    monkeypatch.setenv("SPELLS_PARQUET_COMPRESSION", "gzip")
+    assert spells.external._reconvert(code) == 0
+
+    for dataset_type in (View.DRAFT, View.GAME, "draft_sparse", "game_sparse"):
+        path = spells.cache.data_file_path(code, dataset_type)
+        row_groups = _row_groups(path)
+        assert (
+            sum(num_rows for num_rows, _ in row_groups) == pl.read_parquet(path).height
+        )
+        # sinks cut row groups at streaming chunks of about the row group size
+        assert len(row_groups) > 1
+        assert all(num_rows <= 2 * 50 for num_rows, _ in row_groups)
+        assert all(codecs == {2} for _, codecs in row_groups)
+
+    for view, df in before.items():
+        assert _read_view(code, view).equals(df)
+
+
+def test_add_sets(make_set, monkeypatch, capsys):
+    View = spells.enums.View
+    codes = [
+        make_set(code, seed=seed) for seed, code in enumerate(("TST", "TS2", "BAD"))
+    ]
+    columns, group_by = ["num_taken", "deck", "num_games"], ["rank"]
+    expected = {
+        code: spells.draft_data.summon(code, columns, group_by, write_cache=False)
+        for code in codes
+    }
+    # leave the downloaded dumps and the card files, converted again by the workers
+    for code in codes:
+        for dataset_type in (View.DRAFT, View.GAME, "context"):
+            os.remove(spells.cache.data_file_path(code, dataset_type))
+    with open(
+        spells.external._dataset_path("BAD", View.DRAFT, "PremierDraft"), "wb"
+    ) as f:
+        f.write(b"not gzipped")
+    # a set whose catalog can't be written is reported by its return code
+    codes.append(make_set("ODD", seed=3))
+    card_path = spells.cache.data_file_path("ODD", View.CARD)
+    pl.read_parquet(card_path).head(3).write_parquet(card_path)
+    downloaded = []
+    monkeypatch.setattr(
+        spells.external,
+        "_download_set",
+        lambda set_code, force_download=False: downloaded.append(set_code) or set_code,
+    )
+
+    assert spells.external._add_sets(codes, workers=2) == 1
+    assert sorted(downloaded) == sorted(codes)
+    for code in codes[:2]:
+        assert os.path.isfile(spells.cache.data_file_path(code, "context"))
+        assert spells.cache.read_catalog(code, (View.DRAFT, View.GAME)) is not None
+        assert spells.draft_data.summon(
+            code, columns, group_by, read_cache=False, write_cache=False
+        ).equals(expected[code])
+
+    # the failed set is reported, not swallowed
+    assert not os.path.exists(spells.cache.data_file_path("BAD", View.DRAFT))
+    out = capsys.readouterr().out
+    assert "BAD: failed with" in out
+    assert "Failed to add BAD, ODD" in out
+
+
+def _stub_add_stages(monkeypatch, fail: str | None = None) -> list[str]:
+    """
+    Replace each stage of `_add` by one logging when it starts and ends, raising if it
+    is the stage `fail`
+    """
+    events = []
+    lock = threading.Lock()
+
+    def stage(label, delay=0.0):
+        def run(*args, **kwargs):
+            name = label(*args) if callable(label) else label
+            # like `write_card_file`, waits on the card data fetched ahead of time
+            if kwargs.get("card_data") is not None:
+                kwargs["card_data"].result()
+            with lock:
+                events.append(f"{name} start")
+            time.sleep(delay)
+            if name == fail:
+                raise RuntimeError(f"{name} failed")
+            with lock:
+                events.append(f"{name} end")
+            return 0
+
+        return run
+
+    for module, attr, stub in (
+        (
+            spells.external,
+            "_download_dataset",
+            stage(lambda set_code, view, event_type: f"{view} download", 0.02),
+        ),
+        (
+            spells.external,
+            "download_data_set",
+            stage(lambda set_code, view: f"{view} conversion", 0.02),
+        ),
+        (spells.external.cards, "fetch_card_data", stage("card fetch", 0.05)),
+        (spells.external, "write_card_file", stage("card file")),
+        (spells.external, "get_set_context", stage("set context")),
+        (spells.external, "write_catalog", stage("catalog")),
+        (spells.external, "_write_cubes", stage("cubes")),
+        (spells.external.cache, "clean", stage("clean")),
+    ):
+        monkeypatch.setattr(module, attr, stub)
+    return events
+
+
+def test_add_pipeline(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    events = _stub_add_stages(monkeypatch)
+    assert spells.external._add("TST") == 0
+
+    def before(first, then):
+        return events.index(f"{first} end") < events.index(f"{then} start")
+
+    assert before("draft download", "draft conversion")
+    assert before("game download", "game conversion")
+    assert before("draft conversion", "game conversion")
+    assert before("draft conversion", "card file")
+    assert before("card fetch", "card file")
+    assert before("card file", "set context")
+    assert before("set context", "clean")
+    assert before("game conversion", "clean")
+    assert events[-6:] == [
+        "clean start",
+        "clean end",
+        "catalog start",
+        "catalog end",
+        "cubes start",
+        "cubes end",
+    ]
+    # the game download and the card fetch overlap the draft download
+    assert events.index("game download start") < events.index("draft download end")
+    assert events.index("card fetch start") < events.index("draft download end")
+
+
+@pytest.mark.parametrize(
+    "fail",
+    [
+        "draft download",
+        "game download",
+        "draft conversion",
+        "game conversion",
+        "card fetch",
+        "set context",
+    ],
+)
+def test_add_pipeline_failure(tmp_path, monkeypatch, fail):
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    events = _stub_add_stages(monkeypatch, fail=fail)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(spells.external._add, "TST")
+        with pytest.raises(RuntimeError, match=f"{fail} failed"):
+            future.result(timeout=10)
+    assert "catalog start" not in events
+
+
+def test_write_catalog(gzip_path, tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    View = spells.enums.View
+    draft_path = spells.cache.data_file_path("TST", View.DRAFT)
+    os.makedirs(os.path.dirname(draft_path))
+    spells.external._process_zipped_file(gzip_path, draft_path)
+    pl.DataFrame({"name": ["B", "A"]}).write_parquet(
+        spells.cache.data_file_path("TST", View.CARD)
+    )
+
+    assert spells.external.write_catalog("TST") == 0
+
+    catalog = spells.cache.read_catalog("TST", (View.DRAFT, View.CARD))
+    assert catalog["names"] == ["A", "B"]
+    assert catalog["files"][View.DRAFT]["num_rows"] == len(ROWS)
+    assert catalog["files"][View.DRAFT]["time_range"]["draft_time"] == [
+        datetime.datetime(2024, 9, 24, 18, 31, 41),
+        datetime.datetime(2024, 9, 25, 1, 2, 3),
+    ]
+    assert View.GAME not in catalog["files"]
+
+    pl.read_parquet(draft_path).head(2).write_parquet(draft_path)
+    assert spells.cache.read_catalog("TST", (View.DRAFT,)) is None
+    assert spells.cache.read_catalog("TST", (View.CARD,)) is not None
+
+
+def test_write_catalog_names_mismatch(make_set, capsys):
+    View = spells.enums.View
+    code = make_set("TST")
+    card_path = spells.cache.data_file_path(code, View.CARD)
+    pl.read_parquet(card_path).head(3).write_parquet(card_path)
+
+    assert spells.external.write_catalog(code) == 1
+    assert spells.external._update(code) == 1
+    assert spells.external._reconvert(code) == 1
+    assert "Names mismatch" in capsys.readouterr().out
+
+
+def test_catalog_set_context(gzip_path, tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    draft_path = spells.cache.data_file_path("TST", spells.enums.View.DRAFT)
+    os.makedirs(os.path.dirname(draft_path))
+    spells.external._process_zipped_file(gzip_path, draft_path)
+    context_fp = spells.cache.data_file_path("TST", "context")
+    pl.DataFrame({"release_date": [datetime.date(2024, 9, 24)]}).write_parquet(
+        context_fp
+    )
+    assert spells.external.write_catalog("TST") == 0
+    assert spells.draft_data._get_set_context("TST", None)["release_date"] == (
+        datetime.date(2024, 9, 24)
+    )
+
+    # recalculated without rewriting the catalog
+    pl.DataFrame({"release_date": [datetime.date(2024, 9, 25)]}).write_parquet(
+        context_fp
+    )
+    os.utime(context_fp, ns=(0, 0))
+    assert spells.draft_data._get_set_context("TST", None)["release_date"] == (
+        datetime.date(2024, 9, 25)
+    )
+
+
+def test_get_set_context(gzip_path, tmp_path, monkeypatch):
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    monkeypatch.setattr(spells.external, "MIN_RELEASE_DRAFTS", 0)
+    draft_path = spells.cache.data_file_path("TST", spells.enums.View.DRAFT)
+    os.makedirs(os.path.dirname(draft_path))
+    spells.external._process_zipped_file(gzip_path, draft_path)
+
+    assert spells.external.get_set_context("TST") == 0
+
+    context_fp = spells.cache.data_file_path("TST", "context")
+    days_fp = spells.cache.data_file_path("TST", "draft_days")
+    assert pl.read_parquet(context_fp).rows() == [(datetime.date(2024, 9, 24), 2)]
+    assert pl.read_parquet(days_fp)["num_drafts"].to_list() == [1, 1]
+
+    # only the days in the range are counted again
+    pl.read_parquet(days_fp).with_columns(pl.col("num_drafts") * 0).write_parquet(
+        days_fp
+    )
+    date = datetime.date(2024, 9, 25)
+    assert spells.external.get_set_context("TST", date_range=(date, date)) == 0
+    assert pl.read_parquet(days_fp)["num_drafts"].to_list() == [0, 1]
+    assert pl.read_parquet(context_fp).rows() == [(date, 2)]
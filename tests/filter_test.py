@@ -2,10 +2,16 @@
 Test behavior of filters from dict specification
 """
 
+import datetime
+import os
+
 import pytest
 import polars as pl
 
+import spells.cache
 import spells.filter
+from spells.draft_data import _scan_view
+from spells.enums import View
 
 ROW_0 = {"int": 1, "float": 2.0, "text": "hi"}
 ROW_1 = {"int": 0, "float": -0.4, "text": "foo"}
@@ -124,3 +130,68 @@ def test_from_spec(filter_spec: dict | None, expected: str | None):
 )
 def test_lhs(test_filter, expected):
     assert test_filter.lhs == expected
+
+
+@pytest.mark.parametrize(
+    "filter_spec, expected",
+    [
+        ({"int": 1}, {"int": (1, 1)}),
+        ({"lhs": "int", "rhs": [3, 1, 2], "op": "in"}, {"int": (1, 3)}),
+        ({"$not": {"int": 1}}, {}),
+        (
+            {
+                "$and": [
+                    {"lhs": "int", "rhs": 0, "op": ">"},
+                    {"lhs": "int", "rhs": 5, "op": "<="},
+                    {"lhs": "float", "rhs": 2.4, "op": "<"},
+                ]
+            },
+            {"int": (0, 5), "float": (None, 2.4)},
+        ),
+        (
+            {
+                "$or": [
+                    {"lhs": "int", "rhs": [4, 5], "op": "in"},
+                    {"lhs": "int", "rhs": 1, "op": ">="},
+                    {"text": "foo"},
+                ]
+            },
+            {},
+        ),
+        (
+            {"$or": [{"int": 4}, {"lhs": "int", "rhs": [0, 1], "op": "in"}]},
+            {"int": (0, 4)},
+        ),
+    ],
+)
+def test_bounds(filter_spec, expected):
+    test_filter = spells.filter.from_spec(filter_spec)
+    assert test_filter is not None
+    assert test_filter.bounds == expected
+
+
+@pytest.mark.parametrize("parsed", [False, True])
+def test_timestamp_filter(tmp_path, monkeypatch, parsed):
+    monkeypatch.setenv("SPELLS_DATA_HOME", str(tmp_path))
+    draft_path = spells.cache.data_file_path("TST", View.DRAFT)
+    os.makedirs(os.path.dirname(draft_path))
+    df = pl.DataFrame(
+        {"draft_time": ["2024-09-24 18:31:41", "2024-09-25 01:02:03"], "n": [1, 2]}
+    )
+    if parsed:
+        df = df.with_columns(pl.col("draft_time").str.to_datetime("%Y-%m-%d %H:%M:%S"))
+    df.write_parquet(draft_path)
+
+    for filter_spec, expected in [
+        ({"lhs": "draft_time", "op": ">", "rhs": "2024-09-25"}, [2]),
+        ({"draft_time": "2024-09-24 18:31:41"}, [1]),
+        ({"lhs": "draft_time", "op": "in", "rhs": ["2024-09-25T01:02:03"]}, [2]),
+    ]:
+        test_filter = spells.filter.from_spec(filter_spec)
+        filtered = _scan_view("TST", View.DRAFT).filter(test_filter.expr).collect()
+        assert filtered["n"].to_list() == expected
+
+    test_filter = spells.filter.from_spec({"draft_time": "2024-09-24 18:31:41"})
+    assert test_filter.bounds["draft_time"][0] == datetime.datetime(
+        2024, 9, 24, 18, 31, 41
+    )
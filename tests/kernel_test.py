@@ -0,0 +1,50 @@
+"""
+Test card-weighted expressions against their per-card equivalents
+"""
+
+import polars as pl
+
+from spells import kernel
+
+WEIGHTS = {"A": 2.0, "B": None, "C": 1.0, "D": 2.0}
+
+df = pl.DataFrame(
+    {
+        "pack_card_A": [1, 0, 0, 2],
+        "pack_card_B": [1, 1, 0, 0],
+        "pack_card_C": [0, 1, 0, 1],
+        "pack_card_D": [0, 0, 0, 1],
+        "pick": [1.0, 2.0, None, 1.0],
+    }
+)
+
+
+def _seen(name):
+    return pl.when(pl.col(f"pack_card_{name}") > 0).then(WEIGHTS[name])
+
+
+def test_weighted_max_min():
+    result = df.select(
+        kernel.weighted_max("pack_card", WEIGHTS).alias("max"),
+        kernel.weighted_min("pack_card", WEIGHTS).alias("min"),
+    )
+    expected = df.select(
+        pl.max_horizontal(_seen(name) for name in WEIGHTS).alias("max"),
+        pl.min_horizontal(_seen(name) for name in WEIGHTS).alias("min"),
+    )
+    assert result.equals(expected)
+
+
+def test_count_greater_less():
+    result = df.select(
+        kernel.count_greater("pack_card", WEIGHTS, pl.col("pick")).alias("greater"),
+        kernel.count_less("pack_card", WEIGHTS, pl.col("pick")).alias("less"),
+    )
+    assert result["greater"].to_list() == [1, 0, 0, 2]
+    assert result["less"].to_list() == [0, 1, 0, 0]
+    assert result.schema["greater"] == pl.UInt32
+
+
+def test_weighted_sum():
+    result = df.select(kernel.weighted_sum("pack_card", WEIGHTS).alias("sum"))
+    assert result["sum"].to_list() == [2.0, 1.0, 0.0, 7.0]